@@ -0,0 +1,154 @@
+import atexit
+import bisect
+import json
+import os
+import re
+import threading
+import time
+
+ADDRESS_INDEX_PATH = os.getenv("ADDRESS_INDEX_PATH", "address_index.json")
+ADDRESS_INDEX_MAX_ENTRIES = int(os.getenv("ADDRESS_INDEX_MAX_ENTRIES", "5000"))
+# Usage stats from lookups are written back at most this often
+ADDRESS_INDEX_SAVE_INTERVAL_SECONDS = 60
+
+def normalize_address(address):
+    """
+    Normalize an address for lookups: lowercase, no punctuation, single spaces
+    """
+    return " ".join(re.sub(r"[^\w\s]", " ", (address or "").lower()).split())
+
+class AddressIndex:
+    """
+    Prefix index over the pickup addresses of published posts and their
+    coordinates.
+
+    Normalized addresses are kept in a sorted list so prefix lookups are a
+    bisect plus a short scan. The index is persisted as JSON and holds at most
+    max_entries addresses, evicting the least recently used ones. Usage stats
+    updated by lookups are saved at most every save_interval seconds and
+    when the process exits.
+    """
+
+    def __init__(self, path=ADDRESS_INDEX_PATH, max_entries=ADDRESS_INDEX_MAX_ENTRIES,
+                 save_interval=ADDRESS_INDEX_SAVE_INTERVAL_SECONDS):
+        self.path = path
+        self.max_entries = max_entries
+        self.save_interval = save_interval
+        self._lock = threading.Lock()
+        self._keys = []
+        self._entries = {}
+        self._dirty = False
+        self._last_saved = time.time()
+        self._load()
+
+    def __len__(self):
+        return len(self._keys)
+
+    def lookup(self, address):
+        """
+        Return the stored entry for an address, or None if it was never geocoded
+        """
+        key = normalize_address(address)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry:
+                entry['last_used'] = time.time()
+                entry['uses'] += 1
+                self._dirty = True
+                if entry['last_used'] - self._last_saved >= self.save_interval:
+                    self._save()
+            return entry
+
+    def flush(self):
+        """Save usage stats that haven't been written yet"""
+        with self._lock:
+            if self._dirty:
+                self._save()
+
+    def suggest(self, prefix, limit=5):
+        """
+        Return up to limit stored entries whose address starts with prefix,
+        most used first
+        """
+        key = normalize_address(prefix)
+        if not key:
+            return []
+        with self._lock:
+            matches = []
+            position = bisect.bisect_left(self._keys, key)
+            while position < len(self._keys) and self._keys[position].startswith(key):
+                matches.append(self._entries[self._keys[position]])
+                position += 1
+            matches.sort(key=lambda entry: (entry['uses'], entry['last_used']), reverse=True)
+            return matches[:limit]
+
+    def add(self, address, latitude, longitude):
+        """Store geocoded coordinates for an address and persist the index"""
+        key = normalize_address(address)
+        if not key:
+            return
+        with self._lock:
+            if key not in self._entries:
+                bisect.insort(self._keys, key)
+                self._entries[key] = {"address": address.strip(), "uses": 0}
+            self._entries[key].update({
+                "latitude": latitude,
+                "longitude": longitude,
+                "last_used": time.time()
+            })
+            if len(self._keys) > self.max_entries:
+                self._evict()
+            self._save()
+
+    def _evict(self):
+        # Drop a tenth of the cap at once so eviction doesn't run on every add
+        excess = len(self._keys) - self.max_entries + max(self.max_entries // 10, 1)
+        stale = sorted(self._entries, key=lambda key: self._entries[key]['last_used'])[:excess]
+        for key in stale:
+            del self._entries[key]
+        self._keys = sorted(self._entries)
+        print(f"Evicted {len(stale)} addresses from the address index")
+
+    def _load(self):
+        try:
+            with open(self.path) as f:
+                stored = json.load(f)
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            print(f"Could not load address index from {self.path}: {str(e)}")
+            return
+        for entry in stored:
+            key = normalize_address(entry.get('address'))
+            if key:
+                entry.setdefault('uses', 0)
+                entry.setdefault('last_used', 0)
+                self._entries[key] = entry
+        self._keys = sorted(self._entries)
+        if len(self._keys) > self.max_entries:
+            self._evict()
+        print(f"Loaded {len(self._keys)} addresses from {self.path}")
+
+    def _save(self):
+        try:
+            # Write to a temporary file first so a crash never leaves a partial index
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(list(self._entries.values()), f)
+            os.replace(tmp_path, self.path)
+            self._dirty = False
+            self._last_saved = time.time()
+        except Exception as e:
+            print(f"Could not save address index to {self.path}: {str(e)}")
+
+_address_index = None
+_address_index_lock = threading.Lock()
+
+def get_address_index():
+    """Return the process-wide address index, loading it on first use"""
+    global _address_index
+    with _address_index_lock:
+        if _address_index is None:
+            _address_index = AddressIndex()
+            atexit.register(_address_index.flush)
+        return _address_index
@@ -5,7 +5,7 @@ import time
 from datetime import datetime, timedelta
 import os
 from PIL import Image
-from folium.plugins import LocateControl
+from folium.plugins import LocateControl, HeatMap
 import math
 
 # Import our custom modules
@@ -14,9 +14,18 @@ from firebase_config import (
     save_food_post,
     get_all_food_posts,
     delete_expired_posts,
-    verify_user
+    verify_user,
+    save_need,
+    get_latest_matches
 )
 from geo_utils import geocode_address
+from address_index import get_address_index
+from matching import calculate_trust_score
+from search_index import PostSearchIndex, COMMON_ALLERGENS
+from post_records import PostSnapshot, POST_SNAPSHOT_TTL_SECONDS
+from metrics import start_metrics_server
+from submission_guard import SubmissionGuard
+from heatmap import bin_supply, heatmap_points, supply_table, HEATMAP_CACHE_TTL_SECONDS
 
 # Page configuration
 st.set_page_config(
@@ -258,15 +267,63 @@ if 'expiry_hours' not in st.session_state:
 if 'additional_info' not in st.session_state:
     st.session_state.additional_info = ""
 
+LATEST_MATCHES_TTL_SECONDS = 60
+
 # Initialize Firebase
 firebase_available = initialize_firebase()
 
+# Expose backend metrics for Prometheus (started once per process)
+start_metrics_server()
+
+@st.cache_data(ttl=LATEST_MATCHES_TTL_SECONDS, show_spinner=False)
+def load_latest_matches():
+    """Latest matching run written by the `python matching.py` cron job"""
+    return get_latest_matches()
+
+USE_TYPED_ADDRESS = "Use what I typed"
+
+def address_suggestions(prefix, key, on_change=None):
+    """Offer previously geocoded addresses starting with prefix and return the chosen one"""
+    suggestions = [entry['address'] for entry in get_address_index().suggest(prefix)]
+    if not suggestions:
+        return None
+    choice = st.selectbox("Suggestions", [USE_TYPED_ADDRESS] + suggestions, key=key, on_change=on_change)
+    return None if choice == USE_TYPED_ADDRESS else choice
+
+def apply_pickup_suggestion():
+    """Copy a picked suggestion into the pickup address once, then reset the picker"""
+    choice = st.session_state.pickup_address_suggestion
+    if choice != USE_TYPED_ADDRESS:
+        st.session_state.address = choice
+        st.session_state.pickup_address_suggestion = USE_TYPED_ADDRESS
+
+@st.cache_resource(ttl=POST_SNAPSHOT_TTL_SECONDS, show_spinner=False)
+def get_post_snapshot():
+    """Active posts as one immutable snapshot that every session references"""
+    delete_expired_posts()
+    return PostSnapshot.from_dicts(get_all_food_posts())
+
+@st.cache_data(ttl=HEATMAP_CACHE_TTL_SECONDS, show_spinner=False)
+def get_supply_bins(_posts, version, zoom):
+    """Supply bins for a post set, cached per snapshot version and zoom level"""
+    return bin_supply(_posts, zoom)
+
+@st.cache_resource
+def get_submission_guard():
+    """Duplicate and throttling checks shared by every session in this process"""
+    return SubmissionGuard()
+
+@st.cache_resource
+def get_search_index():
+    """Search index over active posts, shared by every session in this process"""
+    return PostSearchIndex()
+
 # App Header
 st.markdown("<h1 class='main-title'>HungerHeal</h1>", unsafe_allow_html=True)
 st.markdown("<p class='sub-title'>Healing Communities, One Plate at a Time</p>", unsafe_allow_html=True)
 
 # Create tabs
-tab0, tab1, tab2 = st.tabs(["🌍 Our Mission", "📦 Post Surplus Food", "📍 Find Available Food"])
+tab0, tab1, tab2, tab3 = st.tabs(["🌍 Our Mission", "📦 Post Surplus Food", "📍 Find Available Food", "🤝 Register a Need"])
 
 with tab0:
     st.markdown("""
@@ -345,6 +402,10 @@ with tab1:
         - Report suspicious activity
         """)
     
+    # Autocomplete from previously used pickup addresses; picking one skips geocoding
+    address_prefix = st.text_input("🔎 Reuse a previous pickup address", placeholder="Start typing an address")
+    address_suggestions(address_prefix, key="pickup_address_suggestion", on_change=apply_pickup_suggestion)
+
     # Form for posting food
     form_key = st.session_state.get('form_key', 'default_form')
     with st.form(key=form_key):
@@ -401,63 +462,120 @@ with tab1:
             if not (name and contact and food_type and address):
                 st.error("Please fill out all required fields.")
             else:
-                with st.spinner("Geocoding address..."):
-                    lat, lng, geocode_status = geocode_address(address)
-                
-                if geocode_status:
-                    post_data = {
-                        "name": name,
-                        "contact": contact,
-                        "food_type": food_type,
-                        "quantity": quantity,
-                        "address": address,
-                        "latitude": lat,
-                        "longitude": lng,
-                        "timestamp": datetime.now().isoformat(),
-                        "verified": id_file is not None,  # Set verified based on ID upload
-                        "business_type": business_type,
-                        "additional_info": additional_info,
-                        "expiry_hours": expiry_hours
-                    }
-                    
-                    with st.spinner("Saving your food post..."):
-                        success = save_food_post(post_data)
-                    
-                    if success:
-                        st.success("Thank you for sharing! Your food post is now live on the map.")
-                        if id_file:
-                            st.success("Your ID has been uploaded and your post is marked as verified!")
-                        st.balloons()
+                post_data = {
+                    "name": name,
+                    "contact": contact,
+                    "food_type": food_type,
+                    "quantity": quantity,
+                    "address": address,
+                    "timestamp": datetime.now().isoformat(),
+                    "business_type": business_type,
+                    "additional_info": additional_info,
+                    "expiry_hours": expiry_hours
+                }
+
+                # Duplicate and throttling checks run before geocoding, uploads or Firestore writes
+                submission_guard = get_submission_guard()
+                ticket, rejection = submission_guard.admit(post_data)
+                if rejection:
+                    st.warning(rejection)
+                else:
+                    with st.spinner("Geocoding address..."):
+                        lat, lng, geocode_status = geocode_address(address)
+
+                    id_upload = None
+                    if geocode_status and id_file:
+                        # The file is copied to blob storage here; previews are rendered in the background
+                        with st.spinner("Uploading your ID..."):
+                            id_upload = verify_user(id_file)
+
+                    if not geocode_status:
+                        submission_guard.release(ticket)
+                        st.error("Could not find coordinates for this address. Please check and try again.")
+                    elif id_file and id_upload is None:
+                        # verify_user has already explained why the file was rejected
+                        submission_guard.release(ticket)
+                        st.error("Your post was not saved because the ID upload failed. "
+                                 "Remove the file to post without verification, or upload a different one.")
+                    else:
+                        post_data.update({
+                            "latitude": lat,
+                            "longitude": lng,
+                            "verified": id_upload is not None,  # Set verified based on stored ID upload
+                            "id_upload": id_upload['sha256'] if id_upload else None
+                        })
+
+                        with st.spinner("Saving your food post..."):
+                            success = save_food_post(post_data)
                         
-                        # Clear form fields after successful submission
-                        st.session_state.name = ""
-                        st.session_state.contact = ""
-                        st.session_state.food_type = ""
-                        st.session_state.quantity = 5
-                        st.session_state.address = ""
-                        st.session_state.business_type = "Restaurant"
-                        st.session_state.expiry_hours = 24
-                        st.session_state.additional_info = ""
+                        if success:
+                            # Only published pickup addresses are offered as suggestions, never
+                            # addresses typed into search or needs
+                            get_address_index().add(address, lat, lng)
+                            # Refresh the shared snapshot so the new post shows up right away
+                            get_post_snapshot.clear()
+                            st.success("Thank you for sharing! Your food post is now live on the map.")
+                            if id_upload:
+                                st.success("Your ID has been uploaded and your post is marked as verified!")
+                            st.balloons()
                         
-                        # Use form_key to reset the form
-                        st.session_state.form_key = str(time.time())
-                    else:
-                        st.error("There was an issue saving your post. Please try again.")
-                else:
-                    st.error("Could not find coordinates for this address. Please check and try again.")
+                            # Clear form fields after successful submission
+                            st.session_state.name = ""
+                            st.session_state.contact = ""
+                            st.session_state.food_type = ""
+                            st.session_state.quantity = 5
+                            st.session_state.address = ""
+                            st.session_state.business_type = "Restaurant"
+                            st.session_state.expiry_hours = 24
+                            st.session_state.additional_info = ""
+                        
+                            # Use form_key to reset the form
+                            st.session_state.form_key = str(time.time())
+                        else:
+                            # Let the donor retry without being flagged as a duplicate
+                            submission_guard.release(ticket)
+                            st.error("There was an issue saving your post. Please try again.")
 
 with tab2:
     st.markdown("### Find Available Food Near You")
     
     # Add address search
     search_address = st.text_input("🔍 Search by address", placeholder="Enter an address to search")
+    chosen_address = address_suggestions(search_address, key="search_address_suggestion")
+    if chosen_address:
+        search_address = chosen_address
+
+    # Search and filters
+    filter_col1, filter_col2 = st.columns(2)
+    with filter_col1:
+        search_text = st.text_input("🍞 Search food", placeholder="e.g., bread, biryani, Green Plate")
+        business_filter = st.multiselect("Business Type",
+                                         ["Restaurant", "Bakery", "Catering", "Grocery Store", "Individual", "Other"])
+    with filter_col2:
+        min_quantity = st.number_input("Minimum quantity", min_value=0, value=0)
+        exclude_allergens = st.multiselect("Exclude posts mentioning", COMMON_ALLERGENS)
+        verified_only = st.checkbox("Verified donors only")
+
+    view_col1, view_col2 = st.columns(2)
+    with view_col1:
+        map_view = st.radio("Map view", ["Markers", "Supply heatmap"], horizontal=True)
+    with view_col2:
+        map_zoom = st.slider("Map zoom", min_value=8, max_value=16, value=12)
     
-    # Delete expired posts
-    delete_expired_posts()
-    
-    # Get all food posts
+    # Get all food posts (expired posts are deleted when the snapshot is refreshed)
     with st.spinner("Loading available food posts..."):
-        food_posts = get_all_food_posts()
+        food_posts = get_post_snapshot()
+        search_index = get_search_index()
+        search_index.sync(food_posts)
+        search_index.expire()
+        if search_text or business_filter or min_quantity or exclude_allergens or verified_only:
+            food_posts = PostSnapshot(search_index.search(
+                text=search_text,
+                business_types=business_filter,
+                verified_only=verified_only,
+                min_quantity=min_quantity,
+                exclude_terms=exclude_allergens
+            ))
         print(f"\n=== Map Creation ===")
         print(f"Number of food posts to display: {len(food_posts)}")
     
@@ -478,48 +596,34 @@ with tab2:
             print("Could not geocode search address")
             st.error("Could not find this address. Please check and try again.")
     elif food_posts:  # If no search address but we have posts, center on average location
-        avg_lat = sum(post.get('latitude', 0) for post in food_posts) / len(food_posts)
-        avg_lng = sum(post.get('longitude', 0) for post in food_posts) / len(food_posts)
+        avg_lat = sum(post.latitude or 0 for post in food_posts) / len(food_posts)
+        avg_lng = sum(post.longitude or 0 for post in food_posts) / len(food_posts)
         map_center = [avg_lat, avg_lng]
         print(f"Map centered on average location of posts: {map_center}")
     
     # Create map with food markers
     print("\nCreating map...")
-    m = folium.Map(location=map_center, zoom_start=12)
+    m = folium.Map(location=map_center, zoom_start=map_zoom)
     LocateControl().add_to(m)
+
+    # The heatmap replaces individual markers so the browser isn't rendering thousands of them
+    supply_bins = None
+    if map_view == "Supply heatmap":
+        supply_bins = get_supply_bins(food_posts, food_posts.version, map_zoom)
+        HeatMap(heatmap_points(supply_bins), radius=25, blur=15).add_to(m)
+    marker_posts = food_posts if supply_bins is None else ()
     
     # Add markers for each food post
     print("\nAdding markers to map...")
-    for i, post in enumerate(food_posts):
+    for i, post in enumerate(marker_posts):
         print(f"\nProcessing post {i+1}/{len(food_posts)}")
         print(f"Post data: {post}")
         
         # Calculate trust score
-        trust_score = 0
-        if post.get('quantity', 0) > 0:
-            trust_score += 1
-        if post.get('business_type'):
-            trust_score += 1
-        if post.get('name'):
-            trust_score += 1
-        if post.get('contact'):
-            trust_score += 2
-        if post.get('address'):
-            trust_score += 2
-        if post.get('additional_info'):
-            trust_score += 1
-        if post.get('verified'):
-            trust_score += 2
+        trust_score = calculate_trust_score(post)
 
         # Calculate time left
-        expiry_hours = post.get('expiry_hours', 24)
-        try:
-            post_time = datetime.fromisoformat(post.get('timestamp'))
-        except Exception:
-            post_time = datetime.now()
-        expiry_time = post_time + timedelta(hours=expiry_hours)
-        now = datetime.now()
-        time_left = expiry_time - now
+        time_left = post.time_left()
         if time_left.total_seconds() > 0:
             hours, remainder = divmod(int(time_left.total_seconds()), 3600)
             minutes = (remainder // 60)
@@ -534,25 +638,25 @@ with tab2:
 
         popup_html = f"""
         <div style="width: 250px; font-family: system-ui;">
-            <h3 style="color: #4CAF50; margin-bottom: 10px;">{post.get('food_type')}</h3>
-            <p><strong>Quantity:</strong> {post.get('quantity')} units</p>
-            <p><strong>Business:</strong> {post.get('business_type')}</p>
-            <p><strong>Posted by:</strong> {post.get('name')}</p>
-            <p><strong>Contact:</strong> {post.get('contact')}</p>
-            <p><strong>Address:</strong> {post.get('address')}</p>
-            <p><strong>Additional Info:</strong> {post.get('additional_info', 'N/A')}</p>
+            <h3 style="color: #4CAF50; margin-bottom: 10px;">{post.food_type}</h3>
+            <p><strong>Quantity:</strong> {post.quantity} units</p>
+            <p><strong>Business:</strong> {post.business_type}</p>
+            <p><strong>Posted by:</strong> {post.name}</p>
+            <p><strong>Contact:</strong> {post.contact}</p>
+            <p><strong>Address:</strong> {post.address}</p>
+            <p><strong>Additional Info:</strong> {post.additional_info if post.additional_info is not None else 'N/A'}</p>
             <p><strong>Trust Score:</strong> {trust_score}/10</p>
             <p><em style="color: #666;">{time_left_str}</em></p>
         </div>
         """
         
         try:
-            location = [post.get('latitude'), post.get('longitude')]
+            location = [post.latitude, post.longitude]
             print(f"Adding marker at location: {location}")
             folium.Marker(
                 location=location,
                 popup=folium.Popup(popup_html, max_width=300),
-                tooltip=f"{post.get('food_type')} - {post.get('quantity')} units",
+                tooltip=f"{post.food_type} - {post.quantity} units",
                 icon=folium.Icon(color='red', icon='info-sign')
             ).add_to(m)
             print("Marker added successfully")
@@ -566,19 +670,19 @@ with tab2:
     print("\nDisplaying map...")
     st.subheader("Available Food Map")
     folium_static(m, width=1000, height=600)
+
+    if supply_bins is not None:
+        st.subheader("Supply by Area")
+        if supply_bins["weight"].size:
+            st.dataframe(supply_table(supply_bins), use_container_width=True)
+        else:
+            st.info("No food posts to summarize.")
     
     # Display available food in list format (alternative to map)
     st.subheader("Available Food List")
     if food_posts:
         for post in food_posts:
-            expiry_hours = post.get('expiry_hours', 24)
-            try:
-                post_time = datetime.fromisoformat(post.get('timestamp'))
-            except Exception:
-                post_time = datetime.now()
-            expiry_time = post_time + timedelta(hours=expiry_hours)
-            now = datetime.now()
-            time_left = expiry_time - now
+            time_left = post.time_left()
             
             if time_left.total_seconds() > 0:
                 hours, remainder = divmod(int(time_left.total_seconds()), 3600)
@@ -589,10 +693,10 @@ with tab2:
                 
             st.markdown(f"""
             <div class="food-card">
-                <div class="food-title">{post.get('food_type')} - {post.get('quantity')} units</div>
-                <p><strong>From:</strong> {post.get('name')} ({post.get('business_type')})</p>
-                <p><strong>Location:</strong> {post.get('address')}</p>
-                <p><strong>Contact:</strong> {post.get('contact')}</p>
+                <div class="food-title">{post.food_type} - {post.quantity} units</div>
+                <p><strong>From:</strong> {post.name} ({post.business_type})</p>
+                <p><strong>Location:</strong> {post.address}</p>
+                <p><strong>Contact:</strong> {post.contact}</p>
                 <p><em>{time_left_str}</em></p>
             </div>
             """, unsafe_allow_html=True)
@@ -601,6 +705,87 @@ with tab2:
         
     st.info(f"Showing {len(food_posts)} available food posts")
 
+with tab3:
+    st.markdown("### Register a Standing Need")
+    st.markdown("NGOs, shelters and volunteers can register what they need and get matched with donors automatically.")
+
+    with st.form(key="need_form"):
+        col1, col2 = st.columns(2)
+
+        with col1:
+            need_name = st.text_input("Organization Name", placeholder="e.g., Hope Street Shelter")
+            organization_type = st.selectbox("Organization Type", ["NGO", "Shelter", "Volunteer", "Family", "Other"])
+            food_categories = st.text_input("Food Categories (comma separated)",
+                                            placeholder="e.g., Bread, Rice, Vegetables (leave empty for any)")
+
+        with col2:
+            need_contact = st.text_input("Contact Number", placeholder="+1234567890", key="need_contact")
+            capacity = st.number_input("Capacity (units per pickup)", min_value=1, value=20)
+            max_distance_km = st.number_input("Maximum pickup distance (km)", min_value=1, max_value=100, value=10)
+
+        need_address = st.text_input("Pickup Base Address", placeholder="Where your team picks up from")
+        pickup_start_hour, pickup_end_hour = st.slider("Daily pickup window (hour of day)",
+                                                       min_value=0, max_value=24, value=(9, 21))
+
+        need_submit = st.form_submit_button("Register Need")
+
+        if need_submit:
+            if not (need_name and need_contact and need_address):
+                st.error("Please fill out all required fields.")
+            elif pickup_start_hour >= pickup_end_hour:
+                st.error("The pickup window must end after it starts.")
+            else:
+                with st.spinner("Geocoding address..."):
+                    lat, lng, geocode_status = geocode_address(need_address)
+
+                if geocode_status:
+                    need_data = {
+                        "name": need_name,
+                        "contact": need_contact,
+                        "organization_type": organization_type,
+                        "address": need_address,
+                        "latitude": lat,
+                        "longitude": lng,
+                        "capacity": capacity,
+                        "food_categories": [c.strip() for c in food_categories.split(",") if c.strip()],
+                        "pickup_start_hour": pickup_start_hour,
+                        "pickup_end_hour": pickup_end_hour,
+                        "max_distance_km": max_distance_km,
+                        "timestamp": datetime.now().isoformat(),
+                        "status": "open"
+                    }
+                    with st.spinner("Saving your need..."):
+                        success = save_need(need_data)
+                    if success:
+                        st.success("Your need is registered! You'll be included in the next matching run.")
+                    else:
+                        st.error("There was an issue saving your need. Please try again.")
+                else:
+                    st.error("Could not find coordinates for this address. Please check and try again.")
+
+    st.subheader("Latest Matches")
+    with st.spinner("Loading latest matches..."):
+        match_summary, latest_matches = load_latest_matches()
+
+    if latest_matches:
+        for match in latest_matches:
+            st.markdown(f"""
+            <div class="food-card">
+                <div class="food-title">{match['food_type']} - {match['quantity']} units</div>
+                <p><strong>From:</strong> {match['post_name']}</p>
+                <p><strong>To:</strong> {match['need_name']}</p>
+                <p><em>{match['distance_km']} km away · match score {match['score']:.2f}</em></p>
+            </div>
+            """, unsafe_allow_html=True)
+    else:
+        st.info("No matches found in the latest run.")
+
+    if match_summary:
+        stats = match_summary['stats']
+        timing_summary = ", ".join(f"{stage} {seconds * 1000:.0f} ms" for stage, seconds in match_summary['timings'].items())
+        st.caption(f"Last run {match_summary['timestamp'][:16].replace('T', ' ')} · matched {stats['needs']} needs "
+                   f"against {stats['posts']} posts ({stats['candidate_pairs']} candidate pairs) · {timing_summary}")
+
 # Footer
 st.markdown("---")
 st.markdown("© 2025 HungerHeal | Connecting Surplus Food with Hungry People")
\ No newline at end of file
@@ -0,0 +1,81 @@
+"""
+Memory benchmark: per-session post storage before and after shared snapshots.
+
+Before, every session held its own list of Firestore dicts from
+get_all_food_posts. After, every session references one PostSnapshot.
+
+Usage: python benchmarks/post_memory.py [posts] [sessions]  (defaults: 2000 100)
+"""
+import os
+import random
+import sys
+import tracemalloc
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from post_records import PostSnapshot
+
+FOOD_TYPES = ["Biryani", "Bread Loaf", "Vegetable Soup", "Bagels", "Pasta", "Fruit Salad"]
+BUSINESS_TYPES = ["Restaurant", "Bakery", "Catering", "Grocery Store", "Individual", "Other"]
+
+def fake_firestore_posts(count, seed=0):
+    """Build post dicts shaped like get_all_food_posts results"""
+    rng = random.Random(seed)
+    now = datetime.now()
+    return [
+        {
+            "id": f"post{i:08d}",
+            "name": f"Green Plate Cafe {i}",
+            "contact": f"+1555{i:07d}",
+            "food_type": rng.choice(FOOD_TYPES),
+            "quantity": rng.randint(1, 80),
+            "address": f"{rng.randint(1, 999)} Main Street, Brooklyn, NY",
+            "latitude": 40.7 + rng.uniform(-0.2, 0.2),
+            "longitude": -74.0 + rng.uniform(-0.2, 0.2),
+            "timestamp": (now - timedelta(minutes=rng.randint(0, 600))).isoformat(),
+            "verified": rng.random() < 0.5,
+            "business_type": rng.choice(BUSINESS_TYPES),
+            "additional_info": "Keep refrigerated, contains nuts",
+            "expiry_hours": rng.randint(1, 48)
+        }
+        for i in range(count)
+    ]
+
+def measure(build):
+    """Return (result, bytes allocated) for build()"""
+    tracemalloc.start()
+    result = build()
+    allocated, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, allocated
+
+def main():
+    post_count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    session_count = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+
+    # Before: each session fetches and keeps its own copy of the dicts
+    _, before = measure(lambda: [fake_firestore_posts(post_count) for _ in range(session_count)])
+
+    # After: one snapshot is built and every session keeps a reference to it
+    def shared_snapshot():
+        snapshot = PostSnapshot.from_dicts(fake_firestore_posts(post_count))
+        return [snapshot for _ in range(session_count)]
+    _, after = measure(shared_snapshot)
+
+    # Size of a single copy, to separate the compact records from the sharing
+    _, one_dicts = measure(lambda: fake_firestore_posts(post_count))
+    _, one_snapshot = measure(lambda: PostSnapshot.from_dicts(fake_firestore_posts(post_count)))
+
+    # A session of the shared snapshot only adds a reference to it; the
+    # amortized column spreads the one snapshot over all sessions
+    print(f"{post_count} posts, {session_count} sessions")
+    print(f"one copy: dicts {one_dicts / 2**10:.0f} KiB, records {one_snapshot / 2**10:.0f} KiB")
+    print(f"{'':<22}{'total':>14}{'added per session':>20}{'amortized':>14}")
+    print(f"{'dicts per session':<22}{before / 2**20:>11.1f} MiB"
+          f"{before / session_count / 2**10:>16.1f} KiB{before / session_count / 2**10:>10.1f} KiB")
+    print(f"{'shared snapshot':<22}{after / 2**20:>11.1f} MiB"
+          f"{(after - one_snapshot) / session_count:>18.0f} B{after / session_count / 2**10:>10.1f} KiB")
+
+if __name__ == "__main__":
+    main()
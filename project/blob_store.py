@@ -0,0 +1,144 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from abc import ABC, abstractmethod
+
+BLOB_STORE_PATH = os.getenv("BLOB_STORE_PATH", "blob_store")
+CHUNK_SIZE = 64 * 1024
+
+class BlobTooLargeError(Exception):
+    """Raised when a stream exceeds the size limit passed to put_stream"""
+
+class BlobStore(ABC):
+    """
+    Content-addressed blob storage. Blobs are keyed by the SHA-256 of their
+    content, so storing the same file twice keeps a single copy. Each blob can
+    carry a small JSON metadata record (e.g. the digest of its preview).
+    """
+
+    @abstractmethod
+    def put_stream(self, stream, max_bytes=None):
+        """
+        Store everything read from a file-like stream, chunk by chunk.
+
+        Args:
+            stream: Object with a read(size) method, e.g. a Streamlit UploadedFile
+            max_bytes (int): Abort with BlobTooLargeError past this many bytes
+
+        Returns:
+            dict: 'sha256', 'size' and 'duplicate' (True if already stored)
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def put_bytes(self, data):
+        """Store a bytes object, returning the same dict as put_stream"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def open(self, digest):
+        """Open a stored blob for binary reading"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def exists(self, digest):
+        """Check whether a blob with this digest is stored"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_metadata(self, digest):
+        """Return the metadata dict stored for a blob, or {} if there is none"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def update_metadata(self, digest, **fields):
+        """Merge fields into the metadata stored for a blob"""
+        raise NotImplementedError
+
+class LocalBlobStore(BlobStore):
+    """
+    Blob store on the local filesystem, standing in for a cloud bucket.
+    Blobs live at <root>/<first 2 hex chars>/<digest>, their metadata next
+    to them at <digest>.json.
+    """
+
+    def __init__(self, root=BLOB_STORE_PATH):
+        self.root = root
+        self._metadata_lock = threading.Lock()
+        os.makedirs(os.path.join(self.root, "tmp"), exist_ok=True)
+
+    def _path(self, digest):
+        return os.path.join(self.root, digest[:2], digest)
+
+    def put_stream(self, stream, max_bytes=None):
+        sha256 = hashlib.sha256()
+        size = 0
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.join(self.root, "tmp"))
+        try:
+            with os.fdopen(fd, 'wb') as tmp_file:
+                for chunk in iter(lambda: stream.read(CHUNK_SIZE), b""):
+                    size += len(chunk)
+                    if max_bytes is not None and size > max_bytes:
+                        raise BlobTooLargeError(f"Upload exceeds the {max_bytes / (1024 * 1024):.1f} MB limit")
+                    sha256.update(chunk)
+                    tmp_file.write(chunk)
+
+            digest = sha256.hexdigest()
+            path = self._path(digest)
+            duplicate = os.path.exists(path)
+            if duplicate:
+                os.remove(tmp_path)
+            else:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                os.replace(tmp_path, path)
+            return {"sha256": digest, "size": size, "duplicate": duplicate}
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def put_bytes(self, data):
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._path(digest)
+        duplicate = os.path.exists(path)
+        if not duplicate:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.join(self.root, "tmp"))
+            with os.fdopen(fd, 'wb') as tmp_file:
+                tmp_file.write(data)
+            os.replace(tmp_path, path)
+        return {"sha256": digest, "size": len(data), "duplicate": duplicate}
+
+    def open(self, digest):
+        return open(self._path(digest), 'rb')
+
+    def exists(self, digest):
+        return os.path.exists(self._path(digest))
+
+    def get_metadata(self, digest):
+        try:
+            with open(f"{self._path(digest)}.json") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def update_metadata(self, digest, **fields):
+        with self._metadata_lock:
+            metadata = {**self.get_metadata(digest), **fields}
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.join(self.root, "tmp"))
+            with os.fdopen(fd, 'w') as tmp_file:
+                json.dump(metadata, tmp_file)
+            os.replace(tmp_path, f"{self._path(digest)}.json")
+
+_blob_store = None
+_blob_store_lock = threading.Lock()
+
+def get_blob_store():
+    """Return the process-wide blob store"""
+    global _blob_store
+    with _blob_store_lock:
+        if _blob_store is None:
+            _blob_store = LocalBlobStore()
+        return _blob_store
@@ -2,10 +2,21 @@ import firebase_admin
 from firebase_admin import credentials, firestore
 import json
 import os
+import time
 from datetime import datetime, timedelta
 import streamlit as st
 from dotenv import load_dotenv
 
+from blob_store import BlobTooLargeError
+from id_uploads import store_id_upload
+from metrics import (
+    FIRESTORE_LATENCY,
+    FIRESTORE_ERRORS,
+    FIRESTORE_DOCUMENTS_READ,
+    FIRESTORE_DOCUMENTS_WRITTEN,
+    FIRESTORE_DOCUMENTS_DELETED
+)
+
 # Load environment variables (for local development)
 load_dotenv()
 
@@ -15,6 +26,8 @@ def initialize_firebase():
         print("\n=== Firebase Initialization ===")
         # Check if Firebase is already initialized
         if not firebase_admin._apps:
+            # Only time real initializations, not the no-op on every rerun
+            init_start = time.perf_counter()
             print("Firebase not initialized, starting initialization...")
             # Try to get Firebase credentials from Streamlit secrets first
             if 'firebase' in st.secrets:
@@ -56,10 +69,12 @@ def initialize_firebase():
             print("Cleaning up temporary credentials file")
             os.remove(cred_path)
             print("Firebase initialization successful!")
+            FIRESTORE_LATENCY.observe(time.perf_counter() - init_start, operation="initialize_firebase")
             return True
         print("Firebase already initialized")
         return True
     except Exception as e:
+        FIRESTORE_ERRORS.inc(operation="initialize_firebase")
         print(f"Firebase initialization error: {str(e)}")
         print(f"Error type: {type(e)}")
         import traceback
@@ -68,14 +83,21 @@ def initialize_firebase():
         return False
 
 def verify_user(id_file):
-    """Verify user with uploaded ID"""
+    """Store an uploaded ID and mark the user as verified.
+    Returns the stored upload details, or None if the upload was rejected"""
     try:
+        id_upload = store_id_upload(id_file)
         st.session_state.verified = True
-        return True
+        return id_upload
+    except BlobTooLargeError as e:
+        st.error(f"Verification error: {str(e)}")
+        return None
     except Exception as e:
+        print(f"Error storing ID upload: {str(e)}")
         st.error(f"Verification error: {str(e)}")
-        return False
+        return None
 
+@FIRESTORE_LATENCY.time_function(operation="save_food_post")
 def save_food_post(post_data):
     """Save food post data to Firebase"""
     try:
@@ -87,13 +109,16 @@ def save_food_post(post_data):
         
         # Add to Firestore
         doc_ref = db.collection('food_posts').add(post_data)
+        FIRESTORE_DOCUMENTS_WRITTEN.inc(operation="save_food_post")
         print(f"Successfully saved food post with ID: {doc_ref[1].id}")
         return True
     except Exception as e:
+        FIRESTORE_ERRORS.inc(operation="save_food_post")
         print(f"Error saving post: {str(e)}")
         st.error(f"Error saving post: {str(e)}")
         return False
 
+@FIRESTORE_LATENCY.time_function(operation="get_all_food_posts")
 def get_all_food_posts():
     """Get all food posts from Firebase"""
     try:
@@ -101,12 +126,14 @@ def get_all_food_posts():
         print("Attempting to fetch all food posts")
         db = firestore.client()
         posts = db.collection('food_posts').stream()
-        post_list = [post.to_dict() for post in posts]
+        post_list = [{**post.to_dict(), 'id': post.id} for post in posts]
+        FIRESTORE_DOCUMENTS_READ.inc(len(post_list), operation="get_all_food_posts")
         print(f"Successfully fetched {len(post_list)} food posts")
         if len(post_list) > 0:
             print("Sample post data:", post_list[0])
         return post_list
     except Exception as e:
+        FIRESTORE_ERRORS.inc(operation="get_all_food_posts")
         print(f"Error fetching posts: {str(e)}")
         print(f"Error type: {type(e)}")
         import traceback
@@ -114,6 +141,102 @@ def get_all_food_posts():
         st.error(f"Error fetching posts: {str(e)}")
         return []
 
+@FIRESTORE_LATENCY.time_function(operation="save_need")
+def save_need(need_data):
+    """Save a standing recipient need (NGO, shelter, etc.) to Firebase"""
+    try:
+        print(f"Attempting to save need: {need_data}")
+        db = firestore.client()
+        if 'timestamp' not in need_data:
+            need_data['timestamp'] = datetime.now().isoformat()
+        need_data.setdefault('status', 'open')
+
+        doc_ref = db.collection('needs').add(need_data)
+        FIRESTORE_DOCUMENTS_WRITTEN.inc(operation="save_need")
+        print(f"Successfully saved need with ID: {doc_ref[1].id}")
+        return True
+    except Exception as e:
+        FIRESTORE_ERRORS.inc(operation="save_need")
+        print(f"Error saving need: {str(e)}")
+        st.error(f"Error saving need: {str(e)}")
+        return False
+
+@FIRESTORE_LATENCY.time_function(operation="get_open_needs")
+def get_open_needs():
+    """Get all open recipient needs from Firebase"""
+    try:
+        db = firestore.client()
+        needs = db.collection('needs').where('status', '==', 'open').stream()
+        need_list = [{**need.to_dict(), 'id': need.id} for need in needs]
+        FIRESTORE_DOCUMENTS_READ.inc(len(need_list), operation="get_open_needs")
+        print(f"Successfully fetched {len(need_list)} open needs")
+        return need_list
+    except Exception as e:
+        FIRESTORE_ERRORS.inc(operation="get_open_needs")
+        print(f"Error fetching needs: {str(e)}")
+        st.error(f"Error fetching needs: {str(e)}")
+        return []
+
+@FIRESTORE_LATENCY.time_function(operation="save_matches")
+def save_matches(matches, run_summary):
+    """Replace the stored match set with one run's matches.
+    Every match is tagged with the run's id, matches left over from earlier runs
+    are deleted, and the run summary is stored as match_runs/latest. Matches are
+    suggestions recomputed each run; they don't reserve quantity or close needs"""
+    try:
+        db = firestore.client()
+        collection = db.collection('matches')
+        writes = []
+        current_ids = set()
+        for match in matches:
+            doc_id = f"{match['need_id']}_{match['post_id']}"
+            current_ids.add(doc_id)
+            writes.append(('set', collection.document(doc_id), {**match, 'run_id': run_summary['run_id']}))
+        # list_documents returns references only, so stale matches are found without reading them
+        stale = [doc_ref for doc_ref in collection.list_documents() if doc_ref.id not in current_ids]
+        writes.extend(('delete', doc_ref, None) for doc_ref in stale)
+        writes.append(('set', db.collection('match_runs').document('latest'), run_summary))
+
+        # Firestore batches are limited to 500 writes
+        for start in range(0, len(writes), 500):
+            batch = db.batch()
+            for operation, doc_ref, data in writes[start:start + 500]:
+                if operation == 'set':
+                    batch.set(doc_ref, data)
+                else:
+                    batch.delete(doc_ref)
+            batch.commit()
+        FIRESTORE_DOCUMENTS_WRITTEN.inc(len(matches) + 1, operation="save_matches")
+        FIRESTORE_DOCUMENTS_DELETED.inc(len(stale), operation="save_matches")
+        print(f"Successfully saved {len(matches)} matches, deleted {len(stale)} stale matches")
+        return True
+    except Exception as e:
+        FIRESTORE_ERRORS.inc(operation="save_matches")
+        print(f"Error saving matches: {str(e)}")
+        return False
+
+@FIRESTORE_LATENCY.time_function(operation="get_latest_matches")
+def get_latest_matches():
+    """Get the summary and matches of the latest matching run, or (None, [])"""
+    try:
+        db = firestore.client()
+        summary_doc = db.collection('match_runs').document('latest').get()
+        FIRESTORE_DOCUMENTS_READ.inc(operation="get_latest_matches")
+        if not summary_doc.exists:
+            return None, []
+        summary = summary_doc.to_dict()
+        matches = db.collection('matches').where('run_id', '==', summary['run_id']).stream()
+        match_list = [match.to_dict() for match in matches]
+        FIRESTORE_DOCUMENTS_READ.inc(len(match_list), operation="get_latest_matches")
+        match_list.sort(key=lambda match: match['score'], reverse=True)
+        return summary, match_list
+    except Exception as e:
+        FIRESTORE_ERRORS.inc(operation="get_latest_matches")
+        print(f"Error fetching matches: {str(e)}")
+        st.error(f"Error fetching matches: {str(e)}")
+        return None, []
+
+@FIRESTORE_LATENCY.time_function(operation="delete_expired_posts")
 def delete_expired_posts():
     """Delete posts that are past their expiry time"""
     try:
@@ -124,6 +247,7 @@ def delete_expired_posts():
         posts = db.collection('food_posts').stream()
         
         for post in posts:
+            FIRESTORE_DOCUMENTS_READ.inc(operation="delete_expired_posts")
             post_data = post.to_dict()
             if 'timestamp' in post_data and 'expiry_hours' in post_data:
                 post_time = datetime.fromisoformat(post_data['timestamp'])
@@ -132,5 +256,7 @@ def delete_expired_posts():
                 if current_time > expiry_time:
                     # Delete expired post
                     db.collection('food_posts').document(post.id).delete()
+                    FIRESTORE_DOCUMENTS_DELETED.inc(operation="delete_expired_posts")
     except Exception as e:
+        FIRESTORE_ERRORS.inc(operation="delete_expired_posts")
         st.error(f"Error deleting expired posts: {str(e)}")
\ No newline at end of file
@@ -1,11 +1,20 @@
 import streamlit as st
 import requests
 import os
+import time
 from dotenv import load_dotenv
 
+from address_index import get_address_index
+from metrics import GEOCODE_REQUESTS, GEOCODE_LATENCY
+
 # Load environment variables
 load_dotenv()
 
+def _record_geocode(result, start):
+    """Count a geocode request by how it was answered and observe its latency"""
+    GEOCODE_REQUESTS.inc(result=result)
+    GEOCODE_LATENCY.observe(time.perf_counter() - start, result=result)
+
 def geocode_address(address):
     """
     Convert address to latitude and longitude coordinates
@@ -16,8 +25,16 @@ def geocode_address(address):
     Returns:
         tuple: (latitude, longitude, status) where status is True if geocoding was successful
     """
+    start = time.perf_counter()
     try:
         print(f"\nAttempting to geocode address: {address}")
+        # Pickup addresses of earlier posts (e.g. picked from suggestions) skip the API
+        cached = get_address_index().lookup(address)
+        if cached:
+            print(f"Found address in index: {cached['latitude']}, {cached['longitude']}")
+            _record_geocode("index", start)
+            return cached['latitude'], cached['longitude'], True
+
         # First check Streamlit secrets
         api_key = st.secrets.get('google_maps', {}).get('api_key')
         print(f"API key found in secrets: {'Yes' if api_key else 'No'}")
@@ -37,19 +54,23 @@ def geocode_address(address):
             if data["status"] == "OK":
                 location = data["results"][0]["geometry"]["location"]
                 print(f"Successfully geocoded to: {location['lat']}, {location['lng']}")
+                _record_geocode("api", start)
                 return location["lat"], location["lng"], True
             else:
                 print(f"Geocoding error: {data['status']}")
                 print(f"Full response: {data}")
                 # Fall back to mock geocoding
+                _record_geocode("fallback_api_status", start)
                 return mock_geocode(address)
         else:
             # Use mock geocoding
             print("No Google Maps API key found, using mock geocoding")
+            _record_geocode("fallback_no_key", start)
             return mock_geocode(address)
             
     except Exception as e:
         print(f"Geocoding error: {str(e)}")
+        _record_geocode("error", start)
         # Fall back to mock geocoding in case of errors
         return mock_geocode(address)
 
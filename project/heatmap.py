@@ -0,0 +1,96 @@
+from datetime import datetime
+
+import numpy as np
+
+# Bins per 256px map tile, so bins shrink as the map zooms in
+BINS_PER_TILE = 8
+HEATMAP_CACHE_TTL_SECONDS = 5 * 60
+
+def cell_size_degrees(zoom):
+    """
+    Side of a square heatmap bin in degrees for a web map zoom level
+    """
+    return 360.0 / (2 ** zoom * BINS_PER_TILE)
+
+def post_arrays(posts, now=None):
+    """
+    Convert post records into coordinate and weight arrays.
+
+    Each post is weighted by its quantity times the fraction of its listing
+    window still left, so food about to expire counts for less.
+
+    Returns:
+        tuple: (latitudes, longitudes, quantities, weights) numpy arrays
+    """
+    now = (now or datetime.now()).timestamp()
+    located = [post for post in posts if post.latitude is not None and post.longitude is not None]
+    latitudes = np.fromiter((post.latitude for post in located), dtype=np.float64, count=len(located))
+    longitudes = np.fromiter((post.longitude for post in located), dtype=np.float64, count=len(located))
+    quantities = np.fromiter((post.quantity or 0 for post in located), dtype=np.float64, count=len(located))
+    expires_at = np.fromiter((post.expires_at.timestamp() for post in located), dtype=np.float64, count=len(located))
+    window = np.fromiter((post.expiry_hours or 24 for post in located), dtype=np.float64, count=len(located)) * 3600
+
+    time_left_fraction = np.clip((expires_at - now) / window, 0.0, 1.0)
+    return latitudes, longitudes, quantities, quantities * time_left_fraction
+
+def bin_supply(posts, zoom, now=None):
+    """
+    Bin posts into a square grid sized for the zoom level in one vectorized pass.
+
+    Args:
+        posts (iterable): PostRecord objects
+        zoom (int): Web map zoom level
+        now (datetime): Reference time for time-left weighting
+
+    Returns:
+        dict: Arrays 'latitude' and 'longitude' (bin centers), 'weight',
+              'quantity' and 'posts' (post count), heaviest bin first
+    """
+    latitudes, longitudes, quantities, weights = post_arrays(posts, now=now)
+    if latitudes.size == 0:
+        empty = np.empty(0)
+        return {"latitude": empty, "longitude": empty, "weight": empty, "quantity": empty, "posts": empty}
+
+    cell = cell_size_degrees(zoom)
+    cells = np.stack([np.floor(latitudes / cell), np.floor(longitudes / cell)], axis=1).astype(np.int64)
+    unique_cells, inverse = np.unique(cells, axis=0, return_inverse=True)
+    inverse = inverse.reshape(-1)
+
+    bin_weights = np.bincount(inverse, weights=weights)
+    bin_quantities = np.bincount(inverse, weights=quantities)
+    bin_posts = np.bincount(inverse)
+    order = np.argsort(bin_weights)[::-1]
+
+    return {
+        "latitude": (unique_cells[order, 0] + 0.5) * cell,
+        "longitude": (unique_cells[order, 1] + 0.5) * cell,
+        "weight": bin_weights[order],
+        "quantity": bin_quantities[order],
+        "posts": bin_posts[order]
+    }
+
+def heatmap_points(bins):
+    """
+    Return [lat, lng, weight] rows for folium's HeatMap, weights scaled to 0-1
+    """
+    if bins["weight"].size == 0:
+        return []
+    scaled = bins["weight"] / max(bins["weight"].max(), 1e-9)
+    return np.column_stack([bins["latitude"], bins["longitude"], scaled]).tolist()
+
+def supply_table(bins, limit=20):
+    """
+    Return the heaviest bins as rows for a "supply by area" table
+    """
+    return [
+        {
+            "Area (lat, lng)": f"{lat:.4f}, {lng:.4f}",
+            "Posts": int(count),
+            "Total quantity": int(quantity),
+            "Weighted supply": round(float(weight), 1)
+        }
+        for lat, lng, count, quantity, weight in zip(
+            bins["latitude"][:limit], bins["longitude"][:limit], bins["posts"][:limit],
+            bins["quantity"][:limit], bins["weight"][:limit]
+        )
+    ]
@@ -0,0 +1,96 @@
+import io
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image
+
+from blob_store import BlobTooLargeError, get_blob_store
+
+try:
+    # Optional: renders the first page of PDF uploads for previews
+    import pypdfium2 as pdfium
+except ImportError:
+    pdfium = None
+
+MAX_ID_UPLOAD_BYTES = int(os.getenv("MAX_ID_UPLOAD_BYTES", str(10 * 1024 * 1024)))
+PREVIEW_SIZE = (256, 256)
+PREVIEW_WORKERS = 2
+
+_preview_pool = ThreadPoolExecutor(max_workers=PREVIEW_WORKERS, thread_name_prefix="id-preview")
+# Uploads with a preview job queued or running, so resubmits don't queue twice
+_pending_previews = set()
+_pending_previews_lock = threading.Lock()
+
+def store_id_upload(id_file):
+    """
+    Copy an uploaded ID document into the blob store and queue a preview.
+
+    Streamlit holds the whole upload in memory by the time we see it (its own
+    cap is server.maxUploadSize in .streamlit/config.toml), so the size limit
+    is checked up front, before anything is copied.
+
+    Args:
+        id_file: Streamlit UploadedFile (image or PDF)
+
+    Returns:
+        dict: 'sha256', 'size', 'duplicate', 'content_type', 'file_name' and
+              'preview_sha256' (None until a preview has been generated)
+
+    Raises:
+        BlobTooLargeError: If the upload is larger than MAX_ID_UPLOAD_BYTES
+    """
+    if id_file.size > MAX_ID_UPLOAD_BYTES:
+        raise BlobTooLargeError(f"Upload exceeds the {MAX_ID_UPLOAD_BYTES / (1024 * 1024):.1f} MB limit")
+
+    store = get_blob_store()
+    id_file.seek(0)
+    stored = store.put_stream(id_file, max_bytes=MAX_ID_UPLOAD_BYTES)
+    stored["content_type"] = id_file.type
+    stored["file_name"] = id_file.name
+    # The upload record lives in the blob's metadata, next to its preview digest
+    store.update_metadata(stored["sha256"], content_type=id_file.type, file_name=id_file.name, size=stored["size"])
+    stored["preview_sha256"] = store.get_metadata(stored["sha256"]).get("preview_sha256")
+    print(f"Stored ID upload {stored['sha256']} ({stored['size']} bytes, duplicate={stored['duplicate']})")
+
+    if stored["preview_sha256"] is None:
+        with _pending_previews_lock:
+            queued = stored["sha256"] in _pending_previews
+            _pending_previews.add(stored["sha256"])
+        if not queued:
+            # Preview rendering happens off the submit path
+            _preview_pool.submit(generate_preview, stored["sha256"], id_file.type)
+    return stored
+
+def generate_preview(digest, content_type):
+    """
+    Render a PNG thumbnail of a stored upload (first page for PDFs), store it
+    in the blob store and record its digest in the upload's metadata. Failed
+    previews are not recorded, so the next upload of the same file retries.
+    """
+    try:
+        store = get_blob_store()
+        with store.open(digest) as f:
+            if content_type == "application/pdf":
+                if pdfium is None:
+                    print("pypdfium2 not installed, skipping PDF preview")
+                    return None
+                pdf = pdfium.PdfDocument(f.read())
+                image = pdf[0].render(scale=1).to_pil()
+            else:
+                image = Image.open(f)
+                image.load()
+
+        image.thumbnail(PREVIEW_SIZE)
+        buffer = io.BytesIO()
+        image.convert("RGB").save(buffer, format="PNG")
+        preview = store.put_bytes(buffer.getvalue())
+        store.update_metadata(digest, preview_sha256=preview["sha256"])
+        print(f"Generated preview {preview['sha256']} for upload {digest}")
+        return preview["sha256"]
+    except Exception as e:
+        print(f"Error generating preview for {digest}: {str(e)}")
+        return None
+    finally:
+        with _pending_previews_lock:
+            _pending_previews.discard(digest)
@@ -0,0 +1,278 @@
+import math
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from post_records import PostSnapshot
+
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE = 111.32
+DEFAULT_MAX_DISTANCE_KM = 10.0
+# Posts can be listed for at most 48 hours, so urgency is scaled against that
+MAX_EXPIRY_HOURS = 48
+# Suggested cron interval for `python matching.py`
+MATCH_INTERVAL_SECONDS = 15 * 60
+
+SCORE_WEIGHTS = {
+    "distance": 0.4,
+    "urgency": 0.25,
+    "quantity": 0.2,
+    "trust": 0.15,
+}
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    """
+    Great-circle distance between two coordinates in kilometres
+    """
+    lat1, lng1, lat2, lng2 = map(math.radians, (lat1, lng1, lat2, lng2))
+    dlat = lat2 - lat1
+    dlng = lng2 - lng1
+    a = math.sin(dlat / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlng / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+def calculate_trust_score(post):
+    """
+    Score a food post record out of 10 based on how complete and verified it is
+    """
+    trust_score = 0
+    if (post.quantity or 0) > 0:
+        trust_score += 1
+    if post.business_type:
+        trust_score += 1
+    if post.name:
+        trust_score += 1
+    if post.contact:
+        trust_score += 2
+    if post.address:
+        trust_score += 2
+    if post.additional_info:
+        trust_score += 1
+    if post.verified:
+        trust_score += 2
+    return trust_score
+
+def accepts_food(categories, food_type):
+    """
+    Check whether a lowercased food type matches any of the lowercased
+    categories. An empty category list accepts any food.
+    """
+    if not categories:
+        return True
+    return any(category in food_type for category in categories)
+
+def pickup_window_overlaps(need, start, end):
+    """
+    Check whether the need's daily pickup window overlaps [start, end)
+    """
+    start_hour = need.get('pickup_start_hour', 0)
+    end_hour = need.get('pickup_end_hour', 24)
+    if end_hour - start_hour >= 24 or end - start >= timedelta(days=1):
+        return end_hour > start_hour
+    day = datetime.combine(start.date(), datetime.min.time())
+    while day < end:
+        window_start = day + timedelta(hours=start_hour)
+        window_end = day + timedelta(hours=end_hour)
+        if window_start < end and window_end > start:
+            return True
+        day += timedelta(days=1)
+    return False
+
+class SpatialGrid:
+    """
+    Buckets points into roughly cell_km x cell_km cells so that only nearby
+    points have to be compared
+    """
+
+    def __init__(self, cell_km):
+        self.cell_km = cell_km
+        self.lat_step = cell_km / KM_PER_DEGREE
+        self.cells = defaultdict(list)
+
+    def _lng_step(self, row):
+        # Cells get wider in degrees towards the poles so they stay ~cell_km across
+        center_lat = (row + 0.5) * self.lat_step
+        return self.cell_km / (KM_PER_DEGREE * max(math.cos(math.radians(center_lat)), 0.01))
+
+    def insert(self, lat, lng, item):
+        row = math.floor(lat / self.lat_step)
+        col = math.floor(lng / self._lng_step(row))
+        self.cells[(row, col)].append(item)
+
+    def query(self, lat, lng, radius_km):
+        """Yield every item in a cell that may lie within radius_km of (lat, lng)"""
+        lat_span = radius_km / KM_PER_DEGREE
+        widest_lat = min(abs(lat) + lat_span, 89.9)
+        lng_span = radius_km / (KM_PER_DEGREE * max(math.cos(math.radians(widest_lat)), 0.01))
+        first_row = math.floor((lat - lat_span) / self.lat_step)
+        last_row = math.floor((lat + lat_span) / self.lat_step)
+        for row in range(first_row, last_row + 1):
+            step = self._lng_step(row)
+            first_col = math.floor((lng - lng_span) / step)
+            last_col = math.floor((lng + lng_span) / step)
+            for col in range(first_col, last_col + 1):
+                yield from self.cells.get((row, col), ())
+
+def score_pair(need, post, distance_km, hours_left, trust_score):
+    """
+    Score a need/post pair between 0 and 1 (higher is a better match)
+    """
+    max_distance = need.get('max_distance_km', DEFAULT_MAX_DISTANCE_KM)
+    distance_score = max(0.0, 1 - distance_km / max_distance)
+    urgency_score = 1 - min(max(hours_left, 0) / MAX_EXPIRY_HOURS, 1.0)
+    quantity = post.quantity or 0
+    capacity = need.get('capacity', 0)
+    quantity_score = min(quantity, capacity) / max(quantity, capacity, 1)
+    trust = trust_score / 10
+
+    return (SCORE_WEIGHTS["distance"] * distance_score
+            + SCORE_WEIGHTS["urgency"] * urgency_score
+            + SCORE_WEIGHTS["quantity"] * quantity_score
+            + SCORE_WEIGHTS["trust"] * trust)
+
+def match_needs_to_posts(needs, posts, now=None):
+    """
+    Match open recipient needs to active food posts.
+
+    Candidate pairs are pruned with a spatial grid, scored on distance, expiry
+    urgency, quantity fit and trust score, then assigned greedily from the best
+    score down until needs run out of capacity or posts run out of quantity.
+
+    Args:
+        needs (list): Need dicts with an 'id', coordinates and 'capacity'
+        posts (iterable): PostRecord objects, e.g. a PostSnapshot
+        now (datetime): Reference time, defaults to datetime.now()
+
+    Returns:
+        dict: 'matches' (list of match dicts), 'timings' (seconds per stage)
+              and 'stats' (counts per stage)
+    """
+    now = now or datetime.now()
+    timings = {}
+
+    # Stage 1: keep only posts that are still live and have coordinates,
+    # parsing everything the scorer needs once per post
+    stage_start = time.perf_counter()
+    active_posts = []
+    for post in posts:
+        if post.latitude is None or post.longitude is None:
+            continue
+        if (post.quantity or 0) <= 0:
+            continue
+        if post.expires_at <= now:
+            continue
+        active_posts.append((
+            post,
+            (post.food_type or "").lower(),
+            max(post.posted_at, now),
+            post.expires_at,
+            post.time_left(now).total_seconds() / 3600,
+            calculate_trust_score(post)
+        ))
+    open_needs = [
+        need for need in needs
+        if need.get('latitude') is not None and need.get('longitude') is not None
+        and need.get('capacity', 0) > 0
+    ]
+    timings['filter'] = time.perf_counter() - stage_start
+
+    # Stage 2: index posts on a grid sized for the widest search radius
+    stage_start = time.perf_counter()
+    cell_km = max(
+        [need.get('max_distance_km', DEFAULT_MAX_DISTANCE_KM) for need in open_needs],
+        default=DEFAULT_MAX_DISTANCE_KM
+    )
+    grid = SpatialGrid(cell_km)
+    for entry in active_posts:
+        post = entry[0]
+        grid.insert(post.latitude, post.longitude, entry)
+    timings['index'] = time.perf_counter() - stage_start
+
+    # Stage 3: prune and score candidate pairs
+    stage_start = time.perf_counter()
+    candidates = []
+    for need in open_needs:
+        need_lat, need_lng = need['latitude'], need['longitude']
+        max_distance = need.get('max_distance_km', DEFAULT_MAX_DISTANCE_KM)
+        categories = [category.lower() for category in need.get('food_categories') or []]
+        for post, food_type, available_from, expiry_time, hours_left, trust_score in grid.query(need_lat, need_lng, max_distance):
+            if not accepts_food(categories, food_type):
+                continue
+            distance_km = haversine_km(need_lat, need_lng, post.latitude, post.longitude)
+            if distance_km > max_distance:
+                continue
+            if not pickup_window_overlaps(need, available_from, expiry_time):
+                continue
+            score = score_pair(need, post, distance_km, hours_left, trust_score)
+            candidates.append((score, distance_km, need, post))
+    timings['candidates'] = time.perf_counter() - stage_start
+
+    # Stage 4: greedy assignment, best scoring pairs first
+    stage_start = time.perf_counter()
+    candidates.sort(key=lambda candidate: candidate[0], reverse=True)
+    remaining_capacity = {need['id']: need['capacity'] for need in open_needs}
+    remaining_quantity = {entry[0].id: entry[0].quantity for entry in active_posts}
+    matches = []
+    for score, distance_km, need, post in candidates:
+        amount = min(remaining_capacity[need['id']], remaining_quantity[post.id])
+        if amount <= 0:
+            continue
+        remaining_capacity[need['id']] -= amount
+        remaining_quantity[post.id] -= amount
+        matches.append({
+            "need_id": need['id'],
+            "post_id": post.id,
+            "quantity": amount,
+            "score": round(score, 4),
+            "distance_km": round(distance_km, 2),
+            "need_name": need.get('name'),
+            "post_name": post.name,
+            "food_type": post.food_type,
+            "timestamp": now.isoformat()
+        })
+    timings['assign'] = time.perf_counter() - stage_start
+
+    stats = {
+        "posts": len(active_posts),
+        "needs": len(open_needs),
+        "candidate_pairs": len(candidates),
+        "matches": len(matches)
+    }
+    return {"matches": matches, "timings": timings, "stats": stats}
+
+def run_matching(now=None):
+    """
+    Run one batch: fetch open needs and food posts, match them and replace the
+    stored matches with this run's. Timings are reported per stage in seconds.
+    Meant to be run from cron via `python matching.py`, not from the app.
+    """
+    from firebase_config import get_all_food_posts, get_open_needs, save_matches
+
+    print("\n=== Batch Matching ===")
+    stage_start = time.perf_counter()
+    posts = PostSnapshot.from_dicts(get_all_food_posts())
+    needs = get_open_needs()
+    fetch_time = time.perf_counter() - stage_start
+
+    result = match_needs_to_posts(needs, posts, now=now)
+
+    stage_start = time.perf_counter()
+    run_summary = {
+        "run_id": (now or datetime.now()).strftime("%Y%m%dT%H%M%S%f"),
+        "timestamp": datetime.now().isoformat(),
+        "stats": result['stats'],
+        "timings": {"fetch": fetch_time, **result['timings']}
+    }
+    save_matches(result['matches'], run_summary)
+    result['timings'] = {**run_summary['timings'], "save": time.perf_counter() - stage_start}
+
+    print(f"Matching stats: {result['stats']}")
+    for stage, seconds in result['timings'].items():
+        print(f"  {stage}: {seconds * 1000:.1f} ms")
+    return result
+
+if __name__ == "__main__":
+    # Run a single batch, e.g. from cron every MATCH_INTERVAL_SECONDS
+    from firebase_config import initialize_firebase
+
+    if initialize_firebase():
+        run_matching()
@@ -0,0 +1,201 @@
+import functools
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Loopback only by default; set METRICS_HOST=0.0.0.0 to let a remote Prometheus scrape
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9464"))
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_registry = []
+
+def _format_labels(labelnames, values, extra=()):
+    pairs = list(zip(labelnames, values)) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+def _format_value(value):
+    return repr(float(value)) if value != float("inf") else "+Inf"
+
+class Counter:
+    """
+    Monotonically increasing count, optionally split by labels
+    """
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+        _registry.append(self)
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            return self._values.get(key, 0)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+class Histogram:
+    """
+    Distribution of observed values (e.g. latencies in seconds) in cumulative
+    buckets, optionally split by labels
+    """
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        self._lock = threading.Lock()
+        # label values -> [per-bucket counts, sum, count]
+        self._values = {}
+        _registry.append(self)
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            series = self._values.setdefault(key, [[0] * len(self.buckets), 0.0, 0])
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+                    break
+            series[1] += value
+            series[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the duration of a with-block"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def time_function(self, **labels):
+        """Decorator observing the duration of every call to a function"""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.time(**labels):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, (bucket_counts, total, count) in sorted(self._values.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets, bucket_counts):
+                    cumulative += bucket_count
+                    labels = _format_labels(self.labelnames, key, [("le", _format_value(bound))])
+                    lines.append(f"{self.name}_bucket{labels} {cumulative}")
+                labels = _format_labels(self.labelnames, key)
+                lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+                lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+def render_metrics():
+    """Render every registered metric in the Prometheus text exposition format"""
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+# Backend metrics
+FIRESTORE_LATENCY = Histogram(
+    "hungerheal_firestore_call_duration_seconds",
+    "Duration of Firestore helper calls in seconds",
+    ["operation"]
+)
+FIRESTORE_ERRORS = Counter(
+    "hungerheal_firestore_errors_total",
+    "Firestore helper calls that failed",
+    ["operation"]
+)
+FIRESTORE_DOCUMENTS_READ = Counter(
+    "hungerheal_firestore_documents_read_total",
+    "Firestore documents read",
+    ["operation"]
+)
+FIRESTORE_DOCUMENTS_WRITTEN = Counter(
+    "hungerheal_firestore_documents_written_total",
+    "Firestore documents written",
+    ["operation"]
+)
+FIRESTORE_DOCUMENTS_DELETED = Counter(
+    "hungerheal_firestore_documents_deleted_total",
+    "Firestore documents deleted",
+    ["operation"]
+)
+GEOCODE_REQUESTS = Counter(
+    "hungerheal_geocode_requests_total",
+    "Geocoding requests by how they were answered (index, api, fallback, error)",
+    ["result"]
+)
+GEOCODE_LATENCY = Histogram(
+    "hungerheal_geocode_duration_seconds",
+    "Duration of geocode_address calls in seconds",
+    ["result"]
+)
+SUBMISSIONS_REJECTED = Counter(
+    "hungerheal_submissions_rejected_total",
+    "Food posts rejected before reaching Firestore (duplicate, throttled)",
+    ["reason"]
+)
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render_metrics().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Keep scrapes out of the app's console output
+        pass
+
+_server = None
+_server_attempted = False
+_server_lock = threading.Lock()
+
+def start_metrics_server(host=METRICS_HOST, port=METRICS_PORT):
+    """
+    Serve /metrics on a background thread. Safe to call on every Streamlit
+    rerun: the server is only started once per process.
+    """
+    global _server, _server_attempted
+    with _server_lock:
+        if _server_attempted:
+            return _server is not None
+        _server_attempted = True
+        try:
+            _server = ThreadingHTTPServer((host, port), _MetricsHandler)
+        except OSError as e:
+            print(f"Could not start metrics server on {host}:{port}: {str(e)}")
+            return False
+        threading.Thread(target=_server.serve_forever, name="metrics-server", daemon=True).start()
+        print(f"Metrics server listening on {host}:{port}")
+        return True
@@ -0,0 +1,96 @@
+import hashlib
+from datetime import datetime, timedelta
+
+POST_SNAPSHOT_TTL_SECONDS = 30
+
+class PostRecord:
+    """
+    Compact, read-only food post.
+
+    Built once from a Firestore dict with the timestamp parsed into datetimes
+    and coordinates converted to floats, so readers never re-parse them.
+    """
+
+    __slots__ = (
+        'id', 'name', 'contact', 'food_type', 'quantity', 'address',
+        'latitude', 'longitude', 'posted_at', 'expires_at', 'expiry_hours',
+        'verified', 'business_type', 'additional_info'
+    )
+
+    def __init__(self, **fields):
+        for name in self.__slots__:
+            object.__setattr__(self, name, fields.get(name))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("PostRecord is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError("PostRecord is immutable")
+
+    def __repr__(self):
+        return f"PostRecord(id={self.id!r}, food_type={self.food_type!r}, quantity={self.quantity!r})"
+
+    @classmethod
+    def from_dict(cls, post):
+        """Build a record from a Firestore post dict"""
+        try:
+            posted_at = datetime.fromisoformat(post.get('timestamp'))
+        except Exception:
+            posted_at = datetime.now()
+        expiry_hours = post.get('expiry_hours', 24)
+        latitude = post.get('latitude')
+        longitude = post.get('longitude')
+        return cls(
+            id=post.get('id'),
+            name=post.get('name'),
+            contact=post.get('contact'),
+            food_type=post.get('food_type'),
+            quantity=post.get('quantity', 0),
+            address=post.get('address'),
+            latitude=float(latitude) if latitude is not None else None,
+            longitude=float(longitude) if longitude is not None else None,
+            posted_at=posted_at,
+            expires_at=posted_at + timedelta(hours=expiry_hours),
+            expiry_hours=expiry_hours,
+            verified=bool(post.get('verified')),
+            business_type=post.get('business_type'),
+            additional_info=post.get('additional_info')
+        )
+
+    def time_left(self, now=None):
+        """Return the time until this post expires as a timedelta"""
+        return self.expires_at - (now or datetime.now())
+
+class PostSnapshot:
+    """
+    Immutable set of post records shared by every session.
+
+    Sessions hold a reference to the same snapshot instead of their own copy
+    of the posts. The version changes whenever the set of post ids does, so it
+    can be used as a cache key.
+    """
+
+    __slots__ = ('records', 'version', 'created_at')
+
+    def __init__(self, records):
+        object.__setattr__(self, 'records', tuple(records))
+        ids = "\n".join(sorted(str(record.id) for record in self.records))
+        object.__setattr__(self, 'version', hashlib.sha1(ids.encode()).hexdigest()[:16])
+        object.__setattr__(self, 'created_at', datetime.now())
+
+    def __setattr__(self, name, value):
+        raise AttributeError("PostSnapshot is immutable")
+
+    def __len__(self):
+        return len(self.records)
+
+    def __iter__(self):
+        return iter(self.records)
+
+    def __bool__(self):
+        return bool(self.records)
+
+    @classmethod
+    def from_dicts(cls, posts):
+        """Build a snapshot from the Firestore dicts returned by get_all_food_posts"""
+        return cls(PostRecord.from_dict(post) for post in posts)
@@ -0,0 +1,254 @@
+import bisect
+import heapq
+import re
+import threading
+from collections import defaultdict
+from datetime import datetime
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+# Fields searched by free text; additional_info carries allergen notes
+TEXT_FIELDS = ('food_type', 'additional_info', 'name')
+# (lowest, highest) quantity per facet bucket, None meaning unbounded
+QUANTITY_BUCKETS = [(1, 4), (5, 9), (10, 24), (25, 49), (50, None)]
+# Words that signal each allergen, matched as word prefixes so plurals and
+# compounds ("eggs", "fishcake", "peanutbutter") are caught too. Allergen
+# filters err towards hiding a post rather than showing it.
+ALLERGEN_TERMS = {
+    "nuts": ["nut", "almond", "cashew", "walnut", "pecan", "hazelnut", "pistachio", "macadamia",
+             "praline", "marzipan", "nutella", "pesto"],
+    "peanut": ["peanut", "groundnut", "satay"],
+    "dairy": ["dairy", "milk", "cheese", "butter", "cream", "yogurt", "yoghurt", "whey", "ghee",
+              "paneer", "lactose", "casein"],
+    "milk": ["milk", "dairy", "cheese", "butter", "cream", "yogurt", "yoghurt", "whey", "ghee",
+             "paneer", "lactose", "casein"],
+    "gluten": ["gluten", "wheat", "barley", "rye", "spelt", "flour", "bread", "pasta", "couscous",
+               "semolina", "seitan", "bagel"],
+    "wheat": ["wheat", "flour", "bread", "pasta", "couscous", "semolina", "spelt", "seitan", "bagel"],
+    "egg": ["egg", "mayo", "meringue", "omelet", "quiche"],
+    "soy": ["soy", "tofu", "edamame", "miso", "tempeh"],
+    "fish": ["fish", "salmon", "tuna", "cod", "anchov", "sardine", "tilapia", "trout", "haddock",
+             "mackerel"],
+    "shellfish": ["shellfish", "shrimp", "prawn", "crab", "lobster", "clam", "mussel", "oyster",
+                  "scallop", "crayfish"]
+}
+# Known words that prefix-match an allergen term without containing it
+ALLERGEN_FALSE_POSITIVES = ("eggplant", "nutmeg", "nutri", "butternut", "code")
+COMMON_ALLERGENS = list(ALLERGEN_TERMS)
+
+def tokenize(text):
+    """
+    Split text into a set of lowercase alphanumeric tokens
+    """
+    return set(TOKEN_PATTERN.findall(str(text or "").lower()))
+
+def quantity_bucket(quantity):
+    """
+    Return the index of the QUANTITY_BUCKETS entry holding quantity
+    """
+    for i, (lowest, highest) in enumerate(QUANTITY_BUCKETS):
+        if highest is None or quantity <= highest:
+            return i
+    return len(QUANTITY_BUCKETS) - 1
+
+def iter_bits(bitmap):
+    """
+    Yield the positions of the set bits in an int bitmap, lowest first
+    """
+    # Scanning the binary string is linear in the bitmap size, whereas
+    # clearing the lowest bit repeatedly copies the whole int every time
+    bits = bin(bitmap)[:1:-1]
+    position = bits.find('1')
+    while position != -1:
+        yield position
+        position = bits.find('1', position + 1)
+
+class PostSearchIndex:
+    """
+    In-memory inverted index and facet bitmaps over active food posts.
+
+    Every post gets a slot number and every posting list or facet is an int
+    used as a bitmap over slots, so a query is a handful of AND/OR operations
+    instead of a scan over all posts. Posts are added and removed
+    incrementally with sync() and expire().
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._slots = {}
+        self._posts = []
+        self._free_slots = []
+        self._live = 0
+        self._tokens = defaultdict(int)
+        self._vocabulary = []
+        self._business_types = defaultdict(int)
+        self._verified = 0
+        self._quantity_buckets = [0] * len(QUANTITY_BUCKETS)
+        self._expiry_heap = []
+        self._synced_version = None
+
+    def __len__(self):
+        return len(self._slots)
+
+    def add(self, post):
+        """Index a PostRecord"""
+        with self._lock:
+            self._add(post)
+
+    def remove(self, post_id):
+        """Drop a post from the index, ignoring unknown ids"""
+        with self._lock:
+            self._remove(post_id)
+
+    def sync(self, posts):
+        """
+        Bring the index in line with the current list of posts, only touching
+        posts that were added or removed since the last sync. A PostSnapshot
+        whose version was already synced is skipped entirely.
+        """
+        version = getattr(posts, 'version', None)
+        with self._lock:
+            if version is not None and version == self._synced_version:
+                return
+            current = {post.id: post for post in posts if post.id}
+            for post_id in [post_id for post_id in self._slots if post_id not in current]:
+                self._remove(post_id)
+            for post_id, post in current.items():
+                if post_id not in self._slots:
+                    self._add(post)
+            self._synced_version = version
+
+    def expire(self, now=None):
+        """Remove every post whose expiry time has passed"""
+        now = now or datetime.now()
+        with self._lock:
+            while self._expiry_heap and self._expiry_heap[0][0] <= now:
+                _, post_id = heapq.heappop(self._expiry_heap)
+                self._remove(post_id)
+
+    def search(self, text="", business_types=None, verified_only=False, min_quantity=None, exclude_terms=None):
+        """
+        Find posts matching all of the given filters.
+
+        Args:
+            text (str): Free text; every word must prefix-match a word in the
+                        food type, additional info or name
+            business_types (list): Keep posts from any of these business types
+            verified_only (bool): Keep only posts from verified donors
+            min_quantity (int): Keep posts with at least this many units
+            exclude_terms (list): Drop posts with a word starting with any of
+                                  these terms; COMMON_ALLERGENS also drop
+                                  their variants in ALLERGEN_TERMS ("egg"
+                                  excludes "eggs" and "mayo" but not
+                                  "eggplant")
+
+        Returns:
+            list: Matching PostRecord objects
+        """
+        with self._lock:
+            result = self._live
+            for term in tokenize(text):
+                result &= self._prefix_bitmap(term)
+                if not result:
+                    return []
+            if business_types:
+                facet = 0
+                for business_type in business_types:
+                    facet |= self._business_types.get(business_type, 0)
+                result &= facet
+            if verified_only:
+                result &= self._verified
+            for term in exclude_terms or []:
+                result &= ~self._excluded_bitmap(term)
+
+            if min_quantity:
+                # Buckets entirely above min_quantity match as-is; the bucket
+                # containing it has to be checked post by post
+                first = quantity_bucket(min_quantity)
+                facet = 0
+                for bitmap in self._quantity_buckets[first + 1:]:
+                    facet |= bitmap
+                if QUANTITY_BUCKETS[first][0] >= min_quantity:
+                    facet |= self._quantity_buckets[first]
+                else:
+                    for slot in iter_bits(result & self._quantity_buckets[first]):
+                        if (self._posts[slot].quantity or 0) >= min_quantity:
+                            facet |= 1 << slot
+                result &= facet
+
+            return [self._posts[slot] for slot in iter_bits(result)]
+
+    def _prefix_bitmap(self, prefix):
+        bitmap = 0
+        position = bisect.bisect_left(self._vocabulary, prefix)
+        while position < len(self._vocabulary) and self._vocabulary[position].startswith(prefix):
+            bitmap |= self._tokens[self._vocabulary[position]]
+            position += 1
+        return bitmap
+
+    def _excluded_bitmap(self, term):
+        prefixes = ALLERGEN_TERMS.get(term.strip().lower()) or tokenize(term)
+        bitmap = 0
+        for prefix in prefixes:
+            position = bisect.bisect_left(self._vocabulary, prefix)
+            while position < len(self._vocabulary) and self._vocabulary[position].startswith(prefix):
+                token = self._vocabulary[position]
+                if not token.startswith(ALLERGEN_FALSE_POSITIVES):
+                    bitmap |= self._tokens[token]
+                position += 1
+        return bitmap
+
+    def _add(self, post):
+        if post.id in self._slots:
+            self._remove(post.id)
+        if self._free_slots:
+            slot = self._free_slots.pop()
+            self._posts[slot] = post
+        else:
+            slot = len(self._posts)
+            self._posts.append(post)
+        self._slots[post.id] = slot
+        bit = 1 << slot
+        self._live |= bit
+
+        for token in self._post_tokens(post):
+            if token not in self._tokens:
+                bisect.insort(self._vocabulary, token)
+            self._tokens[token] |= bit
+        self._business_types[post.business_type] |= bit
+        if post.verified:
+            self._verified |= bit
+        self._quantity_buckets[quantity_bucket(post.quantity or 0)] |= bit
+
+        heapq.heappush(self._expiry_heap, (post.expires_at, post.id))
+
+    def _remove(self, post_id):
+        slot = self._slots.pop(post_id, None)
+        if slot is None:
+            return
+        post = self._posts[slot]
+        mask = ~(1 << slot)
+        self._live &= mask
+
+        for token in self._post_tokens(post):
+            self._tokens[token] &= mask
+            if not self._tokens[token]:
+                del self._tokens[token]
+                del self._vocabulary[bisect.bisect_left(self._vocabulary, token)]
+        business_type = post.business_type
+        self._business_types[business_type] &= mask
+        if not self._business_types[business_type]:
+            del self._business_types[business_type]
+        self._verified &= mask
+        bucket = quantity_bucket(post.quantity or 0)
+        self._quantity_buckets[bucket] &= mask
+
+        self._posts[slot] = None
+        self._free_slots.append(slot)
+        # Stale expiry heap entries are skipped by _remove's unknown-id check
+
+    @staticmethod
+    def _post_tokens(post):
+        tokens = set()
+        for field in TEXT_FIELDS:
+            tokens |= tokenize(getattr(post, field))
+        return tokens
@@ -0,0 +1,161 @@
+import re
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta
+
+from address_index import normalize_address
+from metrics import SUBMISSIONS_REJECTED
+
+# How long a submitted post is remembered for duplicate detection
+DUPLICATE_WINDOW_SECONDS = 6 * 3600
+# Each contact can post THROTTLE_BURST times at once, then one post per refill interval
+THROTTLE_BURST = 3
+THROTTLE_REFILL_SECONDS = 10 * 60
+
+def normalize_text(text):
+    """
+    Normalize free text for fingerprints: lowercase, no punctuation, words
+    sorted so "Bread Loaf" and "loaf, bread" compare equal
+    """
+    return " ".join(sorted(re.sub(r"[^\w\s]", " ", (text or "").lower()).split()))
+
+def normalize_contact(contact):
+    """
+    Reduce a contact number to its digits
+    """
+    return re.sub(r"\D", "", contact or "") or (contact or "").strip().lower()
+
+def post_fingerprint(post_data):
+    """
+    Fingerprint a post on what makes two submissions the same donation:
+    normalized name, pickup address and food type
+    """
+    return (
+        normalize_text(post_data.get('name')),
+        normalize_address(post_data.get('address')),
+        normalize_text(post_data.get('food_type'))
+    )
+
+def post_window(post_data):
+    """
+    Return the (start, end) availability window of a post as datetimes
+    """
+    try:
+        start = datetime.fromisoformat(post_data.get('timestamp'))
+    except Exception:
+        start = datetime.now()
+    return start, start + timedelta(hours=post_data.get('expiry_hours', 24))
+
+class TokenBucket:
+    """
+    Token bucket allowing `burst` requests at once, refilled at one token per
+    refill_seconds
+    """
+
+    __slots__ = ('tokens', 'updated_at', 'burst', 'refill_seconds')
+
+    def __init__(self, burst, refill_seconds, now):
+        self.tokens = float(burst)
+        self.updated_at = now
+        self.burst = burst
+        self.refill_seconds = refill_seconds
+
+    def refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated_at) / self.refill_seconds)
+        self.updated_at = now
+
+    def seconds_until_token(self):
+        return max(0.0, (1 - self.tokens) * self.refill_seconds)
+
+class SubmissionGuard:
+    """
+    Pre-write stage for food posts: rejects near-duplicates of recent posts
+    and throttles bursts of posts from the same contact before they reach
+    Firestore.
+
+    Recent fingerprints live in a sliding window (a deque ordered by
+    submission time plus a dict for lookups); submissions are throttled per
+    contact with a token bucket. admit() checks and reserves atomically, so
+    two quick resubmits of the same form cannot both get through.
+    """
+
+    def __init__(self, window_seconds=DUPLICATE_WINDOW_SECONDS,
+                 burst=THROTTLE_BURST, refill_seconds=THROTTLE_REFILL_SECONDS):
+        self.window_seconds = window_seconds
+        self.burst = burst
+        self.refill_seconds = refill_seconds
+        self._lock = threading.Lock()
+        self._recent = deque()
+        self._by_fingerprint = {}
+        self._buckets = {}
+
+    def admit(self, post_data, now=None):
+        """
+        Decide whether a post may be written.
+
+        Returns:
+            tuple: (ticket, reason). ticket is None and reason explains why
+                   when the post is rejected; pass the ticket to release() if
+                   the write then fails
+        """
+        now = now if now is not None else time.time()
+        fingerprint = post_fingerprint(post_data)
+        window = post_window(post_data)
+        contact = normalize_contact(post_data.get('contact'))
+
+        with self._lock:
+            self._evict(now)
+
+            for entry in self._by_fingerprint.get(fingerprint, ()):
+                start, end = entry[2]
+                if start < window[1] and window[0] < end:
+                    SUBMISSIONS_REJECTED.inc(reason="duplicate")
+                    return None, "This looks like a duplicate of a post you already shared. It is still live on the map."
+
+            bucket = self._buckets.get(contact)
+            if bucket is None:
+                bucket = self._buckets[contact] = TokenBucket(self.burst, self.refill_seconds, now)
+            bucket.refill(now)
+            if bucket.tokens < 1:
+                SUBMISSIONS_REJECTED.inc(reason="throttled")
+                minutes = int(bucket.seconds_until_token() // 60) + 1
+                return None, f"You've posted several times in a short period. Please try again in about {minutes} minutes."
+            bucket.tokens -= 1
+
+            entry = (now, fingerprint, window, contact)
+            self._recent.append(entry)
+            self._by_fingerprint.setdefault(fingerprint, []).append(entry)
+            return entry, None
+
+    def release(self, ticket):
+        """Undo an admit() whose write failed, refunding the contact's token"""
+        if ticket is None:
+            return
+        with self._lock:
+            entries = self._by_fingerprint.get(ticket[1], [])
+            if ticket in entries:
+                entries.remove(ticket)
+                if not entries:
+                    del self._by_fingerprint[ticket[1]]
+            try:
+                self._recent.remove(ticket)
+            except ValueError:
+                pass
+            bucket = self._buckets.get(ticket[3])
+            if bucket is not None:
+                bucket.tokens = min(bucket.burst, bucket.tokens + 1)
+
+    def _evict(self, now):
+        cutoff = now - self.window_seconds
+        while self._recent and self._recent[0][0] < cutoff:
+            entry = self._recent.popleft()
+            entries = self._by_fingerprint.get(entry[1], [])
+            if entry in entries:
+                entries.remove(entry)
+                if not entries:
+                    del self._by_fingerprint[entry[1]]
+        # Buckets that have refilled completely carry no state worth keeping
+        for contact in [contact for contact, bucket in self._buckets.items()
+                        if bucket.tokens + (now - bucket.updated_at) / bucket.refill_seconds >= bucket.burst]:
+            del self._buckets[contact]
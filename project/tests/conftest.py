@@ -0,0 +1,52 @@
+import os
+import sys
+from datetime import datetime, timedelta
+
+import pytest
+
+# Tests import the app modules directly, the same way app.py does
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from post_records import PostRecord
+
+# Fixed reference time shared by every test that deals with post windows
+NOW = datetime(2026, 5, 4, 12, 0)
+
+def post_dict(post_id="p1", hours_ago=0, **fields):
+    """
+    Build a post dict shaped like get_all_food_posts results, posted
+    hours_ago before NOW; any field can be overridden
+    """
+    post = {
+        "id": post_id,
+        "name": "Green Plate",
+        "contact": "555-0100",
+        "address": "12 Main St",
+        "food_type": "Bread",
+        "quantity": 10,
+        "latitude": 40.7128,
+        "longitude": -74.0060,
+        "timestamp": (NOW - timedelta(hours=hours_ago)).isoformat(),
+        "expiry_hours": 24,
+        "business_type": "Bakery",
+        "verified": False,
+        "additional_info": ""
+    }
+    post.update(fields)
+    return post
+
+@pytest.fixture
+def now():
+    return NOW
+
+@pytest.fixture
+def make_post_dict():
+    """Factory for raw post dicts, e.g. make_post_dict("a", quantity=5)"""
+    return post_dict
+
+@pytest.fixture
+def make_post():
+    """Factory for PostRecord objects, taking the same arguments as make_post_dict"""
+    def build(post_id="p1", hours_ago=0, **fields):
+        return PostRecord.from_dict(post_dict(post_id, hours_ago, **fields))
+    return build
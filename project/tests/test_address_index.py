@@ -0,0 +1,69 @@
+import itertools
+import json
+
+import pytest
+
+import address_index
+from address_index import AddressIndex, normalize_address
+
+@pytest.fixture
+def clock(monkeypatch):
+    # Strictly increasing time so recency ordering is deterministic
+    ticks = itertools.count(1000)
+    monkeypatch.setattr(address_index.time, "time", lambda: next(ticks))
+
+def test_normalize_address():
+    assert normalize_address("  12, Main St. ") == "12 main st"
+    assert normalize_address(None) == ""
+
+def test_suggest_orders_by_uses_then_recency(tmp_path, clock):
+    index = AddressIndex(path=str(tmp_path / "index.json"))
+    index.add("12 Main St", 1.0, 2.0)
+    index.add("14 Main St", 3.0, 4.0)
+    index.add("16 Main St", 5.0, 6.0)
+    index.add("9 Oak Ave", 7.0, 8.0)
+    index.lookup("14 main st.")
+    index.lookup("14 Main St")
+
+    assert [entry['address'] for entry in index.suggest("main")] == []
+    assert [entry['address'] for entry in index.suggest("1")] == ["14 Main St", "16 Main St", "12 Main St"]
+    assert [entry['address'] for entry in index.suggest("1", limit=1)] == ["14 Main St"]
+    assert index.suggest("  ") == []
+
+def test_eviction_drops_least_recently_used(tmp_path, clock):
+    index = AddressIndex(path=str(tmp_path / "index.json"), max_entries=10)
+    for number in range(10):
+        index.add(f"{number} Elm St", 0.0, 0.0)
+    index.lookup("0 Elm St")
+
+    index.add("10 Elm St", 0.0, 0.0)
+
+    # A tenth of the cap goes at once: the two least recently used entries
+    assert len(index) == 9
+    assert index.lookup("1 Elm St") is None
+    assert index.lookup("2 Elm St") is None
+    assert index.lookup("0 Elm St") is not None
+    assert index.lookup("10 Elm St") is not None
+
+def test_reload_keeps_entries_and_flushed_stats(tmp_path, clock):
+    path = str(tmp_path / "index.json")
+    index = AddressIndex(path=path, save_interval=3600)
+    index.add("12 Main St", 40.7, -74.0)
+    index.lookup("12 Main St")
+
+    # Lookup stats are not written until the save interval passes or a flush
+    with open(path) as f:
+        assert json.load(f)[0]['uses'] == 0
+    index.flush()
+    reloaded = AddressIndex(path=path)
+
+    entry = reloaded.lookup("12 main st")
+    assert (entry['latitude'], entry['longitude']) == (40.7, -74.0)
+    assert entry['uses'] == 2
+    assert len(reloaded) == 1
+
+def test_load_ignores_a_corrupt_file(tmp_path):
+    path = tmp_path / "index.json"
+    path.write_text("{not json")
+
+    assert len(AddressIndex(path=str(path))) == 0
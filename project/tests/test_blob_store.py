@@ -0,0 +1,69 @@
+import io
+import os
+
+import pytest
+
+import blob_store
+from blob_store import BlobTooLargeError, LocalBlobStore
+
+class FakeUpload(io.BytesIO):
+    """Stands in for a Streamlit UploadedFile"""
+
+    def __init__(self, data, name="id.png", type="image/png"):
+        super().__init__(data)
+        self.name = name
+        self.type = type
+        self.size = len(data)
+
+def stored_files(root):
+    return sorted(
+        os.path.relpath(os.path.join(directory, name), root)
+        for directory, _, names in os.walk(root) for name in names
+    )
+
+def test_put_stream_stores_content_once(tmp_path):
+    store = LocalBlobStore(str(tmp_path))
+    data = os.urandom(3 * blob_store.CHUNK_SIZE + 17)
+
+    first = store.put_stream(io.BytesIO(data))
+    second = store.put_stream(io.BytesIO(data))
+
+    assert first['duplicate'] is False and second['duplicate'] is True
+    assert first['sha256'] == second['sha256'] and first['size'] == len(data)
+    assert stored_files(tmp_path) == [os.path.join(first['sha256'][:2], first['sha256'])]
+    with store.open(first['sha256']) as f:
+        assert f.read() == data
+
+def test_put_stream_aborts_mid_stream_and_removes_temp_file(tmp_path):
+    store = LocalBlobStore(str(tmp_path))
+    stream = io.BytesIO(os.urandom(4 * blob_store.CHUNK_SIZE))
+
+    with pytest.raises(BlobTooLargeError):
+        store.put_stream(stream, max_bytes=2 * blob_store.CHUNK_SIZE)
+
+    # Stopped after the chunk that crossed the limit, not at the end of the stream
+    assert stream.tell() == 3 * blob_store.CHUNK_SIZE
+    assert stored_files(tmp_path) == []
+
+def test_put_bytes_matches_put_stream_and_metadata_merges(tmp_path):
+    store = LocalBlobStore(str(tmp_path))
+    stored = store.put_bytes(b"preview")
+
+    assert store.put_stream(io.BytesIO(b"preview")) == {**stored, "duplicate": True}
+    assert store.get_metadata(stored['sha256']) == {}
+    store.update_metadata(stored['sha256'], content_type="image/png")
+    store.update_metadata(stored['sha256'], preview_sha256="abc")
+    assert store.get_metadata(stored['sha256']) == {"content_type": "image/png", "preview_sha256": "abc"}
+
+def test_store_id_upload_rejects_oversized_file_before_writing(tmp_path, monkeypatch):
+    id_uploads = pytest.importorskip("id_uploads")
+    store = LocalBlobStore(str(tmp_path))
+    monkeypatch.setattr(id_uploads, "get_blob_store", lambda: store)
+    monkeypatch.setattr(id_uploads, "MAX_ID_UPLOAD_BYTES", 1024)
+    upload = FakeUpload(b"x" * 2048)
+
+    with pytest.raises(BlobTooLargeError):
+        id_uploads.store_id_upload(upload)
+
+    assert upload.tell() == 0
+    assert stored_files(tmp_path) == []
@@ -0,0 +1,52 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from heatmap import bin_supply, cell_size_degrees, heatmap_points, supply_table
+
+def test_cell_size_halves_per_zoom_level():
+    assert cell_size_degrees(13) == pytest.approx(cell_size_degrees(12) / 2)
+
+def test_posts_in_the_same_cell_are_summed(make_post, now):
+    cell = cell_size_degrees(12)
+    # Anchor to a cell corner so the first two posts share a cell
+    lat, lng = 4000 * cell, -7400 * cell
+    posts = [
+        make_post("a", latitude=lat + cell * 0.1, longitude=lng + cell * 0.1, quantity=10),
+        make_post("b", latitude=lat + cell * 0.2, longitude=lng + cell * 0.2, quantity=5),
+        make_post("c", latitude=lat + cell * 5.5, longitude=lng + cell * 5.5, quantity=3)
+    ]
+
+    bins = bin_supply(posts, 12, now=now)
+
+    assert list(bins["posts"]) == [2, 1]
+    assert list(bins["quantity"]) == [15, 3]
+    # Fresh posts with their whole window left weigh their full quantity
+    assert bins["weight"] == pytest.approx([15, 3])
+
+def test_weight_scales_with_time_left(make_post, now):
+    posts = [
+        make_post("fresh", latitude=40.0, longitude=-74.0, quantity=10, hours_ago=0, expiry_hours=10),
+        make_post("half", latitude=41.0, longitude=-74.0, quantity=10, hours_ago=5, expiry_hours=10),
+        make_post("expired", latitude=42.0, longitude=-74.0, quantity=10, hours_ago=20, expiry_hours=10)
+    ]
+
+    bins = bin_supply(posts, 12, now=now)
+
+    assert bins["weight"] == pytest.approx([10, 5, 0])
+
+def test_bin_centers_lie_inside_their_cell(make_post, now):
+    cell = cell_size_degrees(10)
+    bins = bin_supply([make_post("a", latitude=40.7128, longitude=-74.0060)], 10, now=now)
+
+    assert abs(bins["latitude"][0] - 40.7128) <= cell / 2
+    assert abs(bins["longitude"][0] - -74.0060) <= cell / 2
+
+def test_empty_input_and_table_rows(make_post, now):
+    empty = bin_supply([], 12, now=now)
+    assert heatmap_points(empty) == []
+    assert supply_table(empty) == []
+
+    bins = bin_supply([make_post("a", latitude=40.0, longitude=-74.0, quantity=4)], 12, now=now)
+    assert heatmap_points(bins)[0][2] == pytest.approx(1.0)
+    assert supply_table(bins)[0]["Total quantity"] == 4
@@ -0,0 +1,98 @@
+from datetime import timedelta
+
+import pytest
+
+from matching import SpatialGrid, haversine_km, match_needs_to_posts, pickup_window_overlaps
+from post_records import PostSnapshot
+
+def make_need(need_id, lat=40.7128, lng=-74.0060, capacity=10, **fields):
+    return {"id": need_id, "name": f"Shelter {need_id}", "latitude": lat, "longitude": lng, "capacity": capacity, **fields}
+
+def match(needs, posts, now):
+    return match_needs_to_posts(needs, PostSnapshot(posts), now=now)
+
+def test_haversine_km_known_distance():
+    # Manhattan to Brooklyn centers are roughly 12 km apart
+    assert haversine_km(40.7831, -73.9712, 40.6782, -73.9442) == pytest.approx(11.9, abs=0.3)
+
+def test_spatial_grid_query_returns_nearby_and_skips_distant_cells():
+    grid = SpatialGrid(5)
+    grid.insert(40.7128, -74.0060, "near")
+    grid.insert(40.7300, -74.0000, "close")
+    grid.insert(41.8781, -87.6298, "chicago")
+
+    found = set(grid.query(40.7128, -74.0060, 5))
+
+    assert {"near", "close"} <= found
+    assert "chicago" not in found
+
+def test_spatial_grid_query_crosses_cell_boundaries():
+    grid = SpatialGrid(1)
+    # About 0.9 km north of the query point, very likely in a neighbouring row
+    grid.insert(40.7208, -74.0060, "north")
+
+    assert "north" in set(grid.query(40.7128, -74.0060, 1))
+
+def test_pickup_window_overlaps_daily_window(now):
+    need = {"pickup_start_hour": 18, "pickup_end_hour": 20}
+
+    assert pickup_window_overlaps(need, now, now + timedelta(hours=7))
+    assert not pickup_window_overlaps(need, now, now + timedelta(hours=5))
+    # A window that starts tomorrow evening is reached by a post that runs overnight
+    assert pickup_window_overlaps(need, now + timedelta(hours=10), now + timedelta(hours=31))
+
+def test_posts_beyond_max_distance_are_pruned(make_post, now):
+    posts = [make_post("near"), make_post("far", latitude=40.9, longitude=-74.3)]
+    result = match([make_need("n1", capacity=100, max_distance_km=5)], posts, now)
+
+    assert [m["post_id"] for m in result["matches"]] == ["near"]
+    assert result["stats"]["candidate_pairs"] == 1
+
+def test_expired_and_empty_posts_are_skipped(make_post, now):
+    posts = [
+        make_post("expired", hours_ago=30, expiry_hours=24),
+        make_post("empty", quantity=0),
+        make_post("live")
+    ]
+    result = match([make_need("n1", capacity=100)], posts, now)
+
+    assert result["stats"]["posts"] == 1
+    assert [m["post_id"] for m in result["matches"]] == ["live"]
+
+def test_food_categories_filter_candidates(make_post, now):
+    posts = [make_post("bread", food_type="Sourdough Bread"), make_post("rice", food_type="Biryani")]
+    result = match([make_need("n1", capacity=100, food_categories=["bread"])], posts, now)
+
+    assert [m["post_id"] for m in result["matches"]] == ["bread"]
+
+def test_assignment_respects_capacity_and_quantity(make_post, now):
+    posts = [make_post("p1", quantity=8), make_post("p2", quantity=8)]
+    needs = [make_need("n1", capacity=10), make_need("n2", capacity=10)]
+
+    result = match(needs, posts, now)
+
+    assigned_to_need = {}
+    taken_from_post = {}
+    for m in result["matches"]:
+        assigned_to_need[m["need_id"]] = assigned_to_need.get(m["need_id"], 0) + m["quantity"]
+        taken_from_post[m["post_id"]] = taken_from_post.get(m["post_id"], 0) + m["quantity"]
+    assert all(total <= 10 for total in assigned_to_need.values())
+    assert all(total <= 8 for total in taken_from_post.values())
+    assert sum(m["quantity"] for m in result["matches"]) == 16
+
+def test_best_scoring_pair_is_assigned_first(make_post, now):
+    # One post, two needs: the closer need wins the whole quantity
+    posts = [make_post("p1", quantity=10)]
+    needs = [
+        make_need("far", lat=40.75, capacity=10),
+        make_need("close", lat=40.713, capacity=10)
+    ]
+
+    result = match(needs, posts, now)
+
+    assert [(m["need_id"], m["quantity"]) for m in result["matches"]] == [("close", 10)]
+
+def test_timings_are_reported_per_stage(make_post, now):
+    result = match([make_need("n1")], [make_post("p1")], now)
+
+    assert set(result["timings"]) == {"filter", "index", "candidates", "assign"}
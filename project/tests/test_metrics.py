@@ -0,0 +1,56 @@
+import pytest
+
+import metrics
+from metrics import Counter, Histogram, render_metrics
+
+@pytest.fixture(autouse=True)
+def registry(monkeypatch):
+    # Keep test metrics out of the process-wide registry
+    monkeypatch.setattr(metrics, "_registry", [])
+
+def test_labelled_counter_renders_one_series_per_label_value():
+    requests = Counter("test_requests_total", "Requests handled", ["result"])
+    requests.inc(result="ok")
+    requests.inc(2, result="ok")
+    requests.inc(result='bad "quote"\\path\nline')
+
+    assert requests.value(result="ok") == 3
+    assert requests.render() == [
+        "# HELP test_requests_total Requests handled",
+        "# TYPE test_requests_total counter",
+        'test_requests_total{result="bad \\"quote\\"\\\\path\\nline"} 1.0',
+        'test_requests_total{result="ok"} 3.0'
+    ]
+
+def test_histogram_renders_cumulative_buckets_sum_and_count():
+    latency = Histogram("test_latency_seconds", "Latency", ["operation"], buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        latency.observe(value, operation="read")
+
+    assert latency.render() == [
+        "# HELP test_latency_seconds Latency",
+        "# TYPE test_latency_seconds histogram",
+        'test_latency_seconds_bucket{operation="read",le="0.1"} 2',
+        'test_latency_seconds_bucket{operation="read",le="1.0"} 3',
+        'test_latency_seconds_bucket{operation="read",le="+Inf"} 4',
+        'test_latency_seconds_sum{operation="read"} 3.65',
+        'test_latency_seconds_count{operation="read"} 4'
+    ]
+
+def test_unlabelled_metrics_and_timing():
+    runs = Counter("test_runs_total", "Runs")
+    duration = Histogram("test_duration_seconds", "Duration", buckets=(60.0,))
+
+    @duration.time_function()
+    def run():
+        runs.inc()
+
+    run()
+    with duration.time():
+        pass
+
+    output = render_metrics()
+    assert "test_runs_total 1.0\n" in output
+    assert 'test_duration_seconds_bucket{le="60.0"} 2\n' in output
+    assert "test_duration_seconds_count 2\n" in output
+    assert output.endswith("\n")
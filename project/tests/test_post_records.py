@@ -0,0 +1,59 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from post_records import PostRecord, PostSnapshot
+
+def test_record_is_immutable():
+    record = PostRecord.from_dict({"id": "a", "quantity": 5})
+
+    with pytest.raises(AttributeError):
+        record.quantity = 10
+    with pytest.raises(AttributeError):
+        record.extra = 1
+    with pytest.raises(AttributeError):
+        del record.id
+    assert record.quantity == 5
+
+def test_snapshot_is_immutable():
+    snapshot = PostSnapshot([PostRecord.from_dict({"id": "a"})])
+
+    with pytest.raises(AttributeError):
+        snapshot.records = ()
+    with pytest.raises(AttributeError):
+        snapshot.version = "x"
+    assert isinstance(snapshot.records, tuple)
+
+def test_from_dict_parses_timestamp_and_coordinates():
+    record = PostRecord.from_dict({
+        "id": "a",
+        "timestamp": "2026-05-04T12:00:00",
+        "expiry_hours": 6,
+        "latitude": "40.5",
+        "longitude": -74
+    })
+
+    assert record.posted_at == datetime(2026, 5, 4, 12, 0)
+    assert record.expires_at == datetime(2026, 5, 4, 18, 0)
+    assert (record.latitude, record.longitude) == (40.5, -74.0)
+    assert record.time_left(datetime(2026, 5, 4, 17, 0)) == timedelta(hours=1)
+
+def test_from_dict_handles_bad_timestamp_and_missing_coordinates():
+    before = datetime.now()
+    record = PostRecord.from_dict({"id": "a", "timestamp": "yesterday-ish"})
+
+    assert before <= record.posted_at <= datetime.now()
+    assert record.expires_at == record.posted_at + timedelta(hours=24)
+    assert record.latitude is None and record.longitude is None
+    assert record.quantity == 0 and record.verified is False
+
+def test_snapshot_version_depends_only_on_post_ids():
+    a = PostRecord.from_dict({"id": "a", "quantity": 1})
+    b = PostRecord.from_dict({"id": "b"})
+
+    version = PostSnapshot([a, b]).version
+    assert PostSnapshot([b, a]).version == version
+    assert PostSnapshot([PostRecord.from_dict({"id": "a", "quantity": 9}), b]).version == version
+    assert PostSnapshot([a]).version != version
+    assert len(PostSnapshot.from_dicts([{"id": "a"}, {"id": "b"}])) == 2
+    assert not PostSnapshot([])
@@ -0,0 +1,102 @@
+from datetime import timedelta
+
+from post_records import PostSnapshot
+from search_index import PostSearchIndex, iter_bits, quantity_bucket
+
+def ids(posts):
+    return [post.id for post in posts]
+
+def test_iter_bits_and_quantity_bucket():
+    assert list(iter_bits(0)) == []
+    assert list(iter_bits(0b101001)) == [0, 3, 5]
+    assert quantity_bucket(1) == 0
+    assert quantity_bucket(24) == 2
+    assert quantity_bucket(1000) == 4
+
+def test_text_search_prefix_matches_every_word(make_post):
+    index = PostSearchIndex()
+    index.sync([make_post("a", food_type="Sourdough Bread"), make_post("b", food_type="Bread Rolls"),
+                make_post("c", food_type="Rice")])
+
+    assert ids(index.search("bread")) == ["a", "b"]
+    assert ids(index.search("bre sour")) == ["a"]
+    assert ids(index.search("green")) == ["a", "b", "c"]
+    assert index.search("pasta") == []
+
+def test_facets_combine(make_post):
+    index = PostSearchIndex()
+    index.sync([
+        make_post("a", business_type="Bakery", verified=True),
+        make_post("b", business_type="Bakery"),
+        make_post("c", business_type="Restaurant", verified=True)
+    ])
+
+    assert ids(index.search(business_types=["Bakery"])) == ["a", "b"]
+    assert ids(index.search(verified_only=True)) == ["a", "c"]
+    assert ids(index.search(business_types=["Bakery", "Restaurant"], verified_only=True)) == ["a", "c"]
+
+def test_min_quantity_checks_the_boundary_bucket_and_keeps_post_order(make_post):
+    index = PostSearchIndex()
+    index.sync([make_post("a", quantity=12), make_post("b", quantity=30),
+                make_post("c", quantity=20), make_post("d", quantity=5)])
+
+    # 15 falls inside the 10-24 bucket, so "a" is dropped and "c" kept in place
+    assert ids(index.search(min_quantity=15)) == ["b", "c"]
+    assert ids(index.search(min_quantity=10)) == ["a", "b", "c"]
+
+def test_exclusions_catch_allergen_variants(make_post):
+    index = PostSearchIndex()
+    index.sync([
+        make_post("a", food_type="Eggplant Curry", additional_info="Nutritious"),
+        make_post("b", food_type="Fried Rice", additional_info="Contains eggs"),
+        make_post("c", food_type="Fishcake"),
+        make_post("d", food_type="Walnut Bread", additional_info="contains peanuts"),
+        make_post("e", food_type="Cheese Sandwich")
+    ])
+
+    assert ids(index.search(exclude_terms=["egg"])) == ["a", "c", "d", "e"]
+    assert ids(index.search(exclude_terms=["fish"])) == ["a", "b", "d", "e"]
+    assert ids(index.search(exclude_terms=["peanut"])) == ["a", "b", "c", "e"]
+    assert ids(index.search(exclude_terms=["nuts"])) == ["a", "b", "c", "e"]
+    assert ids(index.search(exclude_terms=["dairy"])) == ["a", "b", "c", "d"]
+    # Terms outside COMMON_ALLERGENS are matched as word prefixes
+    assert ids(index.search(exclude_terms=["sandwich"])) == ["a", "b", "c", "d"]
+
+def test_sync_adds_and_removes_incrementally(make_post):
+    index = PostSearchIndex()
+    index.sync([make_post("a"), make_post("b")])
+    index.sync([make_post("b"), make_post("c", food_type="Soup")])
+
+    assert len(index) == 2
+    # "c" reuses the slot freed by "a", and no stale token still points at it
+    assert ids(index.search()) == ["c", "b"]
+    assert ids(index.search("soup")) == ["c"]
+    assert ids(index.search("bread")) == ["b"]
+
+def test_remove_drops_tokens_and_facets(make_post):
+    index = PostSearchIndex()
+    index.add(make_post("a", food_type="Bagels", verified=True))
+    index.remove("a")
+
+    assert len(index) == 0
+    assert index.search("bagels") == []
+    assert index.search(verified_only=True) == []
+    index.remove("unknown")
+
+def test_expire_removes_posts_past_expiry(make_post, now):
+    index = PostSearchIndex()
+    index.sync([make_post("short", expiry_hours=1), make_post("long", expiry_hours=10)])
+
+    index.expire(now + timedelta(hours=2))
+
+    assert ids(index.search()) == ["long"]
+
+def test_sync_skips_a_snapshot_version_it_has_seen(make_post):
+    index = PostSearchIndex()
+    snapshot = PostSnapshot([make_post("a")])
+    index.sync(snapshot)
+    index.remove("a")
+
+    index.sync(snapshot)
+
+    assert len(index) == 0
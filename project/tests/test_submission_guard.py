@@ -0,0 +1,81 @@
+import functools
+
+import pytest
+
+from submission_guard import SubmissionGuard, TokenBucket, post_fingerprint
+
+@pytest.fixture
+def make_post(make_post_dict):
+    """Raw post dicts with a 4 hour window, so a later window is easy to reach"""
+    return functools.partial(make_post_dict, expiry_hours=4)
+
+def test_token_bucket_refills_up_to_burst():
+    bucket = TokenBucket(burst=3, refill_seconds=60, now=0)
+    bucket.tokens = 0
+
+    bucket.refill(30)
+    assert bucket.tokens == pytest.approx(0.5)
+    assert bucket.seconds_until_token() == pytest.approx(30)
+
+    bucket.refill(1000)
+    assert bucket.tokens == 3
+    assert bucket.seconds_until_token() == 0
+
+def test_near_duplicates_share_a_fingerprint(make_post):
+    assert post_fingerprint(make_post()) == post_fingerprint(
+        make_post(name="  green PLATE ", address="12 Main St.", food_type="bread")
+    )
+
+def test_overlapping_duplicate_is_rejected(make_post):
+    guard = SubmissionGuard()
+    ticket, reason = guard.admit(make_post(), now=0)
+    assert ticket is not None and reason is None
+
+    # Available from two hours later, while the first post is still live
+    ticket, reason = guard.admit(make_post(address="12, main st", hours_ago=-2), now=10)
+    assert ticket is None
+    assert "duplicate" in reason
+
+def test_same_donation_in_a_later_window_is_admitted(make_post):
+    guard = SubmissionGuard()
+    guard.admit(make_post(), now=0)
+
+    # Available from when the first post's window closes
+    ticket, reason = guard.admit(make_post(hours_ago=-4), now=10)
+
+    assert ticket is not None and reason is None
+
+def test_duplicates_are_forgotten_after_the_window(make_post):
+    guard = SubmissionGuard(window_seconds=100)
+    guard.admit(make_post(), now=0)
+
+    assert guard.admit(make_post(), now=50)[0] is None
+    assert guard.admit(make_post(), now=101)[0] is not None
+
+def test_contact_is_throttled_after_burst_and_refills(make_post):
+    guard = SubmissionGuard(burst=2, refill_seconds=600)
+    assert guard.admit(make_post(food_type="Bread"), now=0)[0] is not None
+    assert guard.admit(make_post(food_type="Rice"), now=1)[0] is not None
+
+    ticket, reason = guard.admit(make_post(food_type="Soup", contact="(555) 0100"), now=2)
+    assert ticket is None
+    assert "10 minutes" in reason
+
+    # Other contacts have their own bucket
+    assert guard.admit(make_post(food_type="Soup", contact="555-0199"), now=3)[0] is not None
+    # One token is back after a refill interval
+    assert guard.admit(make_post(food_type="Pasta"), now=602)[0] is not None
+
+def test_release_refunds_token_and_forgets_fingerprint(make_post):
+    guard = SubmissionGuard(burst=1, refill_seconds=600)
+    ticket, _ = guard.admit(make_post(), now=0)
+
+    guard.release(ticket)
+
+    ticket, reason = guard.admit(make_post(), now=1)
+    assert ticket is not None and reason is None
+
+def test_release_ignores_missing_ticket(make_post):
+    guard = SubmissionGuard()
+    guard.release(None)
+    assert guard.admit(make_post(), now=0)[0] is not None